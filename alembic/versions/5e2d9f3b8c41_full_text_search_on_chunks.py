@@ -0,0 +1,50 @@
+"""Full-text search on chunks
+
+Revision ID: 5e2d9f3b8c41
+Revises: c3f81a0e6d19
+Create Date: 2026-10-18 14:05:21.903117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "5e2d9f3b8c41"
+down_revision: Union[str, None] = "c3f81a0e6d19"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document_chunks",
+        sa.Column(
+            "content_tsv",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('english', content)", persisted=True),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_document_chunks_content_tsv",
+            "document_chunks",
+            ["content_tsv"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_document_chunks_content_tsv",
+            table_name="document_chunks",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("document_chunks", "content_tsv")
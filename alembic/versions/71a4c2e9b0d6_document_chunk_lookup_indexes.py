@@ -0,0 +1,64 @@
+"""Document chunk lookup indexes
+
+Revision ID: 71a4c2e9b0d6
+Revises: 5e2d9f3b8c41
+Create Date: 2026-10-18 15:32:48.270664
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "71a4c2e9b0d6"
+down_revision: Union[str, None] = "5e2d9f3b8c41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so existing deployments keep serving writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_document_chunks_document_id_chunk_index",
+            "document_chunks",
+            ["document_id", "chunk_index"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_document_chunks_document_id_embedded",
+            "document_chunks",
+            ["document_id"],
+            unique=False,
+            postgresql_where=sa.text("embedding IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_documents_created_at",
+            "documents",
+            ["created_at"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_documents_created_at",
+            table_name="documents",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_document_chunks_document_id_embedded",
+            table_name="document_chunks",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_document_chunks_document_id_chunk_index",
+            table_name="document_chunks",
+            postgresql_concurrently=True,
+        )
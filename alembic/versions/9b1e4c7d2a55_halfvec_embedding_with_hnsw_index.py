@@ -0,0 +1,69 @@
+"""Halfvec embedding copy with HNSW index
+
+Revision ID: 9b1e4c7d2a55
+Revises: 42cb99277a8a
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import HALFVEC
+
+# revision identifiers, used by Alembic.
+revision: str = "9b1e4c7d2a55"
+down_revision: Union[str, None] = "42cb99277a8a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Rows backfilled per committed UPDATE
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document_chunks",
+        sa.Column("embedding_half", HALFVEC(3072), nullable=True),
+    )
+    # Backfill existing rows from the full-precision column in committed
+    # batches, then build the index without blocking writes
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        while True:
+            result = connection.execute(
+                sa.text(
+                    "UPDATE document_chunks "
+                    "SET embedding_half = embedding::halfvec(3072) "
+                    "WHERE id IN ("
+                    "SELECT id FROM document_chunks "
+                    "WHERE embedding IS NOT NULL AND embedding_half IS NULL "
+                    "LIMIT :batch_size)"
+                ),
+                {"batch_size": BACKFILL_BATCH_SIZE},
+            )
+            if result.rowcount == 0:
+                break
+
+        op.create_index(
+            "ix_document_chunks_embedding_half_hnsw",
+            "document_chunks",
+            ["embedding_half"],
+            unique=False,
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding_half": "halfvec_cosine_ops"},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_document_chunks_embedding_half_hnsw",
+            table_name="document_chunks",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("document_chunks", "embedding_half")
@@ -0,0 +1,30 @@
+"""Document upload batches
+
+Revision ID: a6c93e5f1b27
+Revises: e4b7d1f0a932
+Create Date: 2026-10-18 17:02:14.668310
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a6c93e5f1b27"
+down_revision: Union[str, None] = "e4b7d1f0a932"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("documents", sa.Column("batch_id", sa.UUID(), nullable=True))
+    op.create_index(
+        op.f("ix_documents_batch_id"), "documents", ["batch_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_documents_batch_id"), table_name="documents")
+    op.drop_column("documents", "batch_id")
@@ -0,0 +1,42 @@
+"""Content hash deduplication
+
+Revision ID: c3f81a0e6d19
+Revises: 9b1e4c7d2a55
+Create Date: 2026-10-18 11:47:03.552910
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f81a0e6d19"
+down_revision: Union[str, None] = "9b1e4c7d2a55"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "documents", sa.Column("content_hash", sa.String(length=64), nullable=True)
+    )
+    op.create_index(
+        op.f("ix_documents_content_hash"), "documents", ["content_hash"], unique=False
+    )
+    op.create_table(
+        "chunk_embeddings",
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("embedding_model", sa.String(length=100), nullable=False),
+        sa.Column("embedding", Vector(3072), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("content_hash", "embedding_model"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("chunk_embeddings")
+    op.drop_index(op.f("ix_documents_content_hash"), table_name="documents")
+    op.drop_column("documents", "content_hash")
@@ -0,0 +1,75 @@
+"""Document listing keyset indexes
+
+Revision ID: e4b7d1f0a932
+Revises: 71a4c2e9b0d6
+Create Date: 2026-10-18 16:10:37.514208
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b7d1f0a932"
+down_revision: Union[str, None] = "71a4c2e9b0d6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so existing deployments keep serving writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_documents_created_at_id",
+            "documents",
+            ["created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_documents_status_created_at_id",
+            "documents",
+            ["status", "created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_documents_classification_created_at_id",
+            "documents",
+            ["classification", "created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        # Superseded by ix_documents_created_at_id
+        op.drop_index(
+            "ix_documents_created_at",
+            table_name="documents",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_documents_created_at",
+            "documents",
+            ["created_at"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_documents_classification_created_at_id",
+            table_name="documents",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_documents_status_created_at_id",
+            table_name="documents",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_documents_created_at_id",
+            table_name="documents",
+            postgresql_concurrently=True,
+        )
@@ -1,19 +1,58 @@
 import uuid
 import json
+import re
+from functools import partial
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db
+from app.config import get_settings
 from app.models.database import Document, DocumentStatus
-from app.models.schemas import ChatRequest
-from app.core.retrieval import search_similar_chunks
-from app.core.prompts import build_chat_prompt, SYSTEM_PROMPT_CHAT
+from app.models.schemas import ChatRequest, MultiDocumentChatRequest
+from app.core.retrieval import (
+    embed_query,
+    mmr_rerank,
+    search_chunks_hybrid,
+    search_similar_chunks,
+    search_similar_chunks_multi_doc,
+)
+from app.core import response_cache, telemetry
+from app.core.embedding_cache import get_query_embedding_cache
+from app.core.vector_cache import get_document_vector_cache
+from app.core.prompts import (
+    build_chat_prompt,
+    build_context,
+    estimate_tokens,
+    SYSTEM_PROMPT_CHAT,
+)
 from app.core.llm import generate_response_stream
 
+settings = get_settings()
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+}
+
+# Cached answers are replayed in pieces of this many words
+REPLAY_WORDS_PER_TOKEN = 8
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _replay_tokens(answer: str) -> list[str]:
+    """Split a cached answer into token-sized pieces, preserving whitespace."""
+    words = re.findall(r"\S+\s*|\s+", answer)
+    return [
+        "".join(words[i : i + REPLAY_WORDS_PER_TOKEN])
+        for i in range(0, len(words), REPLAY_WORDS_PER_TOKEN)
+    ]
+
 
 @router.post("")
 async def chat_with_document(
@@ -41,13 +80,27 @@ async def chat_with_document(
             detail=f"Document is not ready. Status: {document.status.value}",
         )
 
-    # Retrieve relevant chunks
-    chunks = await search_similar_chunks(
-        db=db,
-        document_id=request.document_id,
-        query=request.message,
-        top_k=5,
-    )
+    # Over-fetch candidates; MMR and the token budget pick the context
+    if request.retrieval_mode == "hybrid":
+        search = search_chunks_hybrid
+    else:
+        # Hot documents are searched in-process when the vector cache is on
+        search = partial(search_similar_chunks, updated_at=document.updated_at)
+    try:
+        # Embedded once for retrieval, MMR and the response cache
+        query_embedding = await embed_query(request.message)
+        chunks = await search(
+            db=db,
+            document_id=request.document_id,
+            query=request.message,
+            top_k=settings.context_candidates,
+            query_embedding=query_embedding,
+        )
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Embedding service timed out",
+        )
 
     if not chunks:
         raise HTTPException(
@@ -55,26 +108,164 @@ async def chat_with_document(
             detail="No content found in document",
         )
 
+    with telemetry.timed(telemetry.RETRIEVAL_SECONDS, step="context"):
+        context_texts, context_chunks, _ = build_context(
+            mmr_rerank(chunks, query_embedding)
+        )
+    chunk_ids = [str(chunk.id) for chunk in context_chunks]
+
     # Build prompt with context
-    context_texts = [chunk.content for chunk in chunks]
     conversation_history = [msg.model_dump() for msg in request.conversation_history]
     prompt = build_chat_prompt(request.message, context_texts, conversation_history)
+    prompt_tokens = estimate_tokens(SYSTEM_PROMPT_CHAT) + estimate_tokens(prompt)
+
+    # Follow-up turns depend on the conversation, so only first questions
+    # are served from (and stored in) the response cache
+    use_cache = settings.response_cache_enabled and not request.conversation_history
+    if use_cache:
+        cached_answer = await response_cache.lookup_response(
+            request.document_id, query_embedding, chunk_ids
+        )
+        if cached_answer is not None:
+
+            async def replay():
+                for token in _replay_tokens(cached_answer):
+                    yield _sse("token", {"content": token})
+                yield _sse(
+                    "done", {"chunk_ids": chunk_ids, "prompt_tokens": prompt_tokens}
+                )
+
+            return StreamingResponse(
+                replay(), media_type="text/event-stream", headers=SSE_HEADERS
+            )
+
+    telemetry.LLM_TOKENS.labels("prompt").inc(prompt_tokens)
 
     # Stream response
     async def generate():
-        chunk_ids = [str(chunk.id) for chunk in chunks]
+        answer_parts = []
 
         async for token in generate_response_stream(prompt, SYSTEM_PROMPT_CHAT):
-            yield f"event: token\ndata: {json.dumps({'content': token})}\n\n"
+            answer_parts.append(token)
+            yield _sse("token", {"content": token})
+        telemetry.LLM_TOKENS.labels("completion").inc(
+            estimate_tokens("".join(answer_parts))
+        )
 
         # Send completion event with source chunk IDs
-        yield f"event: done\ndata: {json.dumps({'chunk_ids': chunk_ids})}\n\n"
+        yield _sse("done", {"chunk_ids": chunk_ids, "prompt_tokens": prompt_tokens})
+
+        if use_cache:
+            await response_cache.store_response(
+                request.document_id, query_embedding, chunk_ids, "".join(answer_parts)
+            )
 
     return StreamingResponse(
-        generate(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-        },
+        generate(), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+@router.post("/multi")
+async def chat_with_documents(
+    request: MultiDocumentChatRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Chat across several documents using RAG, with one streamed answer.
+    Returns a streaming response (SSE).
+    """
+    document_ids = list(dict.fromkeys(request.document_ids))
+
+    # Verify all documents exist and are processed in one query
+    stmt = select(Document.id, Document.filename, Document.status).where(
+        Document.id.in_(document_ids)
     )
+    result = await db.execute(stmt)
+    documents = {row.id: row for row in result}
+
+    missing = [str(doc_id) for doc_id in document_ids if doc_id not in documents]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Documents not found: {', '.join(missing)}",
+        )
+
+    not_ready = [
+        f"{doc.id} ({doc.status.value})"
+        for doc in documents.values()
+        if doc.status != DocumentStatus.COMPLETED
+    ]
+    if not_ready:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Documents are not ready: {', '.join(not_ready)}",
+        )
+
+    # Retrieve relevant chunks, capping how many come from each document
+    try:
+        query_embedding = await embed_query(request.message)
+        chunks = await search_similar_chunks_multi_doc(
+            db=db,
+            document_ids=document_ids,
+            query=request.message,
+            top_k=settings.multi_doc_top_k,
+            per_document_limit=settings.multi_doc_per_document_limit,
+            query_embedding=query_embedding,
+        )
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Embedding service timed out",
+        )
+
+    if not chunks:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No content found in documents",
+        )
+
+    # Build prompt with context, labelled by source document
+    with telemetry.timed(telemetry.RETRIEVAL_SECONDS, step="context"):
+        context_texts, context_chunks, _ = build_context(
+            mmr_rerank(chunks, query_embedding),
+            label=lambda chunk: f"[{documents[chunk.document_id].filename}]",
+        )
+    conversation_history = [msg.model_dump() for msg in request.conversation_history]
+    prompt = build_chat_prompt(request.message, context_texts, conversation_history)
+    prompt_tokens = estimate_tokens(SYSTEM_PROMPT_CHAT) + estimate_tokens(prompt)
+    telemetry.LLM_TOKENS.labels("prompt").inc(prompt_tokens)
+
+    # Stream response
+    async def generate():
+        completion_tokens = 0
+        async for token in generate_response_stream(prompt, SYSTEM_PROMPT_CHAT):
+            completion_tokens += estimate_tokens(token)
+            yield _sse("token", {"content": token})
+        telemetry.LLM_TOKENS.labels("completion").inc(completion_tokens)
+
+        # Send completion event with source chunk and document IDs
+        yield _sse(
+            "done",
+            {
+                "chunk_ids": [str(chunk.id) for chunk in context_chunks],
+                "document_ids": [str(chunk.document_id) for chunk in context_chunks],
+                "prompt_tokens": prompt_tokens,
+            },
+        )
+
+    return StreamingResponse(
+        generate(), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+@router.get("/cache/stats")
+async def get_response_cache_stats():
+    """
+    Get response cache hit/miss counters, and this process's query embedding
+    and vector cache use.
+    """
+    return {
+        **await response_cache.get_stats(),
+        "query_embedding_cache": get_query_embedding_cache().stats(),
+        "vector_cache": get_document_vector_cache().stats(),
+    }
@@ -1,76 +1,361 @@
+import asyncio
+import base64
+import binascii
+import contextlib
+import hashlib
+import json
 import uuid
 import os
-import shutil
+from collections import Counter
+from datetime import datetime
 from pathlib import Path
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
-from sqlalchemy import select
+from typing import AsyncIterator
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    UploadFile,
+    File,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db
 from app.config import get_settings
 from app.models.database import Document, DocumentChunk, DocumentStatus
 from app.models.schemas import (
+    BatchStatusResponse,
+    BatchUploadResponse,
+    DocumentPurgeRequest,
+    DocumentPurgeResponse,
+    DocumentListItem,
     DocumentResponse,
     DocumentUploadResponse,
     ProcessingStatusResponse,
 )
-from app.workers.tasks import process_document
+from app.workers.tasks import enqueue_batch, process_document
+from app.core import progress, telemetry
+from app.core.vector_cache import get_document_vector_cache
+from app.core.response_cache import invalidate_document, invalidate_documents
 
 settings = get_settings()
 router = APIRouter(prefix="/documents", tags=["documents"])
 
+UPLOAD_BLOCK_SIZE = 1024 * 1024
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+}
+
+# Fields selectable with `fields=` when listing documents
+LIST_FIELDS = tuple(DocumentListItem.model_fields)
+
 # Ensure upload directory exists
 Path(settings.upload_dir).mkdir(parents=True, exist_ok=True)
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _encode_cursor(created_at: datetime, document_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{document_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode()
+        created_at, document_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(document_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+def _parse_fields(fields: str | None) -> list[str]:
+    if fields is None:
+        return list(LIST_FIELDS)
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(requested) - set(LIST_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. "
+            f"Supported: {', '.join(LIST_FIELDS)}",
+        )
+    return list(dict.fromkeys(["id", *requested]))
+
+
+def _validate_extension(filename: str) -> str:
+    extension = Path(filename).suffix.lower()
+    if extension not in [".pdf", ".txt"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file type: {extension}. Supported: .pdf, .txt",
+        )
+    return extension
+
+
+def _file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. Max size: {settings.max_file_size_mb}MB",
+    )
+
+
+def _write_block(buffer, digest, block: bytes) -> None:
+    digest.update(block)
+    buffer.write(block)
+
+
+async def _save_upload(blocks: AsyncIterator[bytes], file_path: str) -> str:
+    """
+    Write an upload to `file_path` block by block and return its SHA-256.
+
+    Hashing and disk writes run in a worker thread so large uploads do not
+    block the event loop. Data goes to a temporary file that is renamed into
+    place once complete, and the upload is aborted as soon as it exceeds
+    `max_file_size_mb`.
+    """
+    max_size = settings.max_file_size_mb * 1024 * 1024
+    temp_path = f"{file_path}.part"
+    digest = hashlib.sha256()
+    size = 0
+    pending = bytearray()
+
+    buffer = await asyncio.to_thread(open, temp_path, "wb")
+    try:
+        async for block in blocks:
+            size += len(block)
+            if size > max_size:
+                raise _file_too_large()
+            # Coalesce small network reads into one thread hop per block
+            pending += block
+            if len(pending) >= UPLOAD_BLOCK_SIZE:
+                await asyncio.to_thread(_write_block, buffer, digest, bytes(pending))
+                pending.clear()
+        if pending:
+            await asyncio.to_thread(_write_block, buffer, digest, bytes(pending))
+        await asyncio.to_thread(buffer.close)
+        await asyncio.to_thread(os.replace, temp_path, file_path)
+    except BaseException:
+        buffer.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+
+    return digest.hexdigest()
+
+
+async def _upload_blocks(file: UploadFile) -> AsyncIterator[bytes]:
+    while block := await file.read(UPLOAD_BLOCK_SIZE):
+        yield block
+
+
+async def _create_document(
+    db: AsyncSession,
+    filename: str,
+    content_type: str,
+    blocks: AsyncIterator[bytes],
+) -> uuid.UUID:
+    """Store an upload, record it and queue it for processing."""
+    extension = _validate_extension(filename)
+    document_id = uuid.uuid4()
+    file_path = os.path.join(settings.upload_dir, f"{document_id}{extension}")
+    content_hash = await _save_upload(blocks, file_path)
+
+    # The row is written only once the file is in place, and the file is
+    # removed again if the row cannot be written
+    db.add(
+        Document(
+            id=document_id,
+            filename=filename,
+            content_type=content_type,
+            status=DocumentStatus.PENDING,
+            content_hash=content_hash,  # identical uploads reuse earlier results
+        )
+    )
+    try:
+        await db.commit()
+    except BaseException:
+        await asyncio.to_thread(_remove_upload_files, [document_id])
+        raise
+
+    process_document.delay(
+        str(document_id), file_path, trace_context=telemetry.trace_context()
+    )
+    return document_id
+
+
+def _remove_upload_files(document_ids: list[uuid.UUID]) -> None:
+    """Remove stored uploads; runs after the response is sent."""
+    for document_id in document_ids:
+        for ext in [".pdf", ".txt"]:
+            file_path = os.path.join(settings.upload_dir, f"{document_id}{ext}")
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(file_path)
+
+
 @router.post("/upload", response_model=DocumentUploadResponse)
 async def upload_document(
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
 ):
     """Upload a document for processing."""
-    # Validate file type
     filename = file.filename or "unknown"
-    extension = Path(filename).suffix.lower()
+    _validate_extension(filename)
+    if file.size is not None and file.size > settings.max_file_size_mb * 1024 * 1024:
+        raise _file_too_large()
 
-    if extension not in [".pdf", ".txt"]:
+    document_id = await _create_document(
+        db,
+        filename,
+        file.content_type or "application/octet-stream",
+        _upload_blocks(file),
+    )
+
+    return DocumentUploadResponse(
+        id=document_id,
+        message="Document uploaded successfully. Processing started.",
+    )
+
+
+@router.post("/batch", response_model=BatchUploadResponse)
+async def upload_batch(
+    files: list[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Upload many documents at once.
+
+    All rows are inserted in one statement and processed as one batch:
+    documents are staged in parallel and small documents share embedding
+    requests. Track progress with GET /documents/batch/{batch_id}.
+    """
+    if len(files) > settings.batch_upload_max_files:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported file type: {extension}. Supported: .pdf, .txt",
+            detail=f"Too many files. Max per batch: {settings.batch_upload_max_files}",
         )
+    max_size = settings.max_file_size_mb * 1024 * 1024
+    for file in files:
+        _validate_extension(file.filename or "unknown")
+        if file.size is not None and file.size > max_size:
+            raise _file_too_large()
 
-    # Validate file size
-    file.file.seek(0, 2)  # Seek to end
-    size = file.file.tell()
-    file.file.seek(0)  # Reset
+    batch_id = uuid.uuid4()
+    rows: list[dict] = []
+    file_paths: list[str] = []
+    try:
+        for file in files:
+            filename = file.filename or "unknown"
+            document_id = uuid.uuid4()
+            file_path = os.path.join(
+                settings.upload_dir, f"{document_id}{_validate_extension(filename)}"
+            )
+            content_hash = await _save_upload(_upload_blocks(file), file_path)
+            file_paths.append(file_path)
+            rows.append(
+                {
+                    "id": document_id,
+                    "filename": filename,
+                    "content_type": file.content_type or "application/octet-stream",
+                    "status": DocumentStatus.PENDING,
+                    "content_hash": content_hash,
+                    "batch_id": batch_id,
+                }
+            )
 
-    max_size = settings.max_file_size_mb * 1024 * 1024
-    if size > max_size:
+        await db.execute(insert(Document).values(rows))
+        await db.commit()
+    except BaseException:
+        await asyncio.to_thread(_remove_upload_files, [row["id"] for row in rows])
+        raise
+
+    enqueue_batch(
+        str(batch_id),
+        [(str(row["id"]), path) for row, path in zip(rows, file_paths)],
+        trace_context=telemetry.trace_context(),
+    )
+
+    return BatchUploadResponse(
+        batch_id=batch_id,
+        document_ids=[row["id"] for row in rows],
+        message=f"{len(rows)} documents uploaded successfully. Processing started.",
+    )
+
+
+@router.get("/batch/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch_status(
+    batch_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+):
+    """Get aggregate processing progress of an upload batch."""
+    stmt = select(Document.id, Document.status).where(Document.batch_id == batch_id)
+    rows = (await db.execute(stmt)).all()
+    if not rows:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File too large. Max size: {settings.max_file_size_mb}MB",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found",
         )
+    counts = Counter(row.status for row in rows)
 
-    # Create document record
-    document = Document(
-        filename=filename,
-        content_type=file.content_type or "application/octet-stream",
-        status=DocumentStatus.PENDING,
+    # Finished documents count in full; running ones by their published percent
+    running = await progress.get_percents(
+        [row.id for row in rows if row.status == DocumentStatus.PROCESSING]
+    )
+    finished = counts[DocumentStatus.COMPLETED] + counts[DocumentStatus.FAILED]
+    percent = (100 * finished + sum(running.values())) / len(rows)
+
+    return BatchStatusResponse(
+        batch_id=batch_id,
+        total=len(rows),
+        pending=counts[DocumentStatus.PENDING],
+        processing=counts[DocumentStatus.PROCESSING],
+        completed=counts[DocumentStatus.COMPLETED],
+        failed=counts[DocumentStatus.FAILED],
+        percent=round(percent, 1),
     )
-    db.add(document)
-    await db.commit()
-    await db.refresh(document)
 
-    # Save file to disk
-    file_path = os.path.join(settings.upload_dir, f"{document.id}{extension}")
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
 
-    # Queue processing task
-    process_document.delay(str(document.id), file_path)
+@router.post("/upload/stream", response_model=DocumentUploadResponse)
+async def upload_document_stream(
+    request: Request,
+    filename: str = Query(..., min_length=1, max_length=255),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Upload a document sent as the raw request body.
+
+    Unlike multipart uploads, which are spooled in full before the handler
+    runs, the body is written to disk as it arrives and rejected as soon as
+    it exceeds the size limit.
+    """
+    _validate_extension(filename)
+    content_length = request.headers.get("content-length")
+    max_size = settings.max_file_size_mb * 1024 * 1024
+    if content_length and content_length.isdigit() and int(content_length) > max_size:
+        raise _file_too_large()
+
+    document_id = await _create_document(
+        db,
+        filename,
+        request.headers.get("content-type", "application/octet-stream"),
+        request.stream(),
+    )
 
     return DocumentUploadResponse(
-        id=document.id,
+        id=document_id,
         message="Document uploaded successfully. Processing started.",
     )
 
@@ -94,6 +379,86 @@ async def get_document(
     return document
 
 
+@router.get("/status/stream")
+async def stream_document_status(
+    document_ids: list[uuid.UUID] = Query(..., alias="id"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Stream processing progress for one or more documents as server-sent
+    events.
+
+    Each watched document first gets a `progress` event with its current
+    state, followed by live `progress` events published by the worker
+    (stage, percent complete and stage detail such as embedded/total). A
+    `done` event is sent and the stream closes once every document has
+    completed or failed. Postgres is queried once per connection.
+    """
+    document_ids = list(dict.fromkeys(document_ids))
+    if len(document_ids) > settings.progress_stream_max_documents:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.progress_stream_max_documents} documents "
+            "can be watched per connection",
+        )
+
+    stmt = select(
+        Document.id, Document.status, Document.error_message, Document.updated_at
+    ).where(Document.id.in_(document_ids))
+    rows = (await db.execute(stmt)).all()
+    missing = set(document_ids) - {row.id for row in rows}
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Documents not found: {', '.join(sorted(map(str, missing)))}",
+        )
+    # Nothing else touches the database; release the connection now
+    await db.close()
+
+    initial = [
+        {
+            "document_id": str(row.id),
+            "stage": row.status.value,
+            "status": row.status.value,
+            "percent": 100 if row.status == DocumentStatus.COMPLETED else None,
+            "timestamp": row.updated_at.timestamp(),
+            **({"error": row.error_message} if row.error_message else {}),
+        }
+        for row in rows
+    ]
+    watching = {
+        event["document_id"]
+        for event in initial
+        if event["status"] not in progress.TERMINAL_STATUSES
+    }
+
+    async def generate():
+        for event in initial:
+            yield _sse("progress", event)
+
+        if watching:
+            events = progress.subscribe(
+                [uuid.UUID(d) for d in watching], settings.progress_heartbeat_seconds
+            )
+            async for event in events:
+                if event is None:
+                    # Comment line keeps proxies from closing idle streams
+                    yield ": heartbeat\n\n"
+                    continue
+                yield _sse("progress", event)
+                if event["status"] in progress.TERMINAL_STATUSES:
+                    watching.discard(event["document_id"])
+                    if not watching:
+                        await events.aclose()
+                        break
+
+        yield _sse("done", {"document_ids": [str(d) for d in document_ids]})
+
+    return StreamingResponse(
+        generate(), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
 @router.get("/{document_id}/status", response_model=ProcessingStatusResponse)
 async def get_document_status(
     document_id: uuid.UUID,
@@ -119,42 +484,104 @@ async def get_document_status(
     )
 
 
-@router.get("/", response_model=list[DocumentResponse])
+@router.get(
+    "/", response_model=list[DocumentListItem], response_model_exclude_unset=True
+)
 async def list_documents(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=200),
+    cursor: str | None = Query(
+        None, description="X-Next-Cursor value from the previous page"
+    ),
+    fields: str | None = Query(
+        None, description="Comma-separated fields to return, e.g. id,filename,status"
+    ),
+    document_status: DocumentStatus | None = Query(None, alias="status"),
+    classification: str | None = None,
+    skip: int = Query(0, ge=0, deprecated=True),
 ):
-    """List all documents."""
-    stmt = (
-        select(Document).offset(skip).limit(limit).order_by(Document.created_at.desc())
-    )
-    result = await db.execute(stmt)
-    return list(result.scalars().all())
+    """
+    List documents, newest first.
+
+    Pages are keyed on (created_at, id): pass the X-Next-Cursor header of
+    one response as `cursor` to fetch the next page. The header is omitted
+    on the last page.
+    """
+    selected = _parse_fields(fields)
+    # The cursor needs created_at and id even when they were not requested
+    columns = dict.fromkeys([*selected, "created_at"])
+    stmt = select(*(getattr(Document, name) for name in columns))
+
+    if document_status is not None:
+        stmt = stmt.where(Document.status == document_status)
+    if classification is not None:
+        stmt = stmt.where(Document.classification == classification)
+    if cursor is not None:
+        created_at, document_id = _decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(Document.created_at, Document.id) < tuple_(created_at, document_id)
+        )
+    elif skip:
+        stmt = stmt.offset(skip)
+
+    stmt = stmt.order_by(Document.created_at.desc(), Document.id.desc()).limit(limit)
+    rows = (await db.execute(stmt)).mappings().all()
+
+    if len(rows) == limit:
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = _encode_cursor(
+            last["created_at"], last["id"]
+        )
+
+    return [DocumentListItem(**{name: row[name] for name in selected}) for row in rows]
 
 
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_document(
     document_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """Delete a document and its chunks."""
-    stmt = select(Document).where(Document.id == document_id)
+    # Chunks go via ON DELETE CASCADE, so none are loaded into the API process
+    stmt = delete(Document).where(Document.id == document_id).returning(Document.id)
     result = await db.execute(stmt)
-    document = result.scalar_one_or_none()
-
-    if not document:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found",
         )
+    await db.commit()
+    await invalidate_document(document_id)
+    get_document_vector_cache().invalidate(document_id)
 
-    # Delete file from disk
-    for ext in [".pdf", ".txt"]:
-        file_path = os.path.join(settings.upload_dir, f"{document.id}{ext}")
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    background_tasks.add_task(_remove_upload_files, [document_id])
 
-    # Delete document (cascades to chunks)
-    await db.delete(document)
+
+@router.post("/purge", response_model=DocumentPurgeResponse)
+async def purge_documents(
+    request: DocumentPurgeRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
+    """Delete many documents and their chunks in a single statement."""
+    requested = list(dict.fromkeys(request.document_ids))
+    stmt = delete(Document).where(Document.id.in_(requested)).returning(Document.id)
+    result = await db.execute(stmt)
+    deleted = set(result.scalars().all())
     await db.commit()
+
+    deleted_ids = [document_id for document_id in requested if document_id in deleted]
+    await invalidate_documents(deleted_ids)
+    vector_cache = get_document_vector_cache()
+    for document_id in deleted_ids:
+        vector_cache.invalidate(document_id)
+    background_tasks.add_task(_remove_upload_files, deleted_ids)
+
+    return DocumentPurgeResponse(
+        deleted=deleted_ids,
+        not_found=[
+            document_id for document_id in requested if document_id not in deleted
+        ],
+    )
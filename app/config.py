@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -19,6 +20,7 @@ class Settings(BaseSettings):
 
     # Redis
     redis_url: str = "redis://localhost:6379/0"
+    redis_socket_timeout_seconds: float = 1.0
 
     # Google AI
     google_api_key: str = ""
@@ -26,12 +28,95 @@ class Settings(BaseSettings):
     # File Storage
     upload_dir: str = "./uploads"
     max_file_size_mb: int = 50
+    batch_upload_max_files: int = 500
 
     # Processing
     chunk_size: int = 1000
     chunk_overlap: int = 200
+    chunker: str = "fast"  # or "langchain", which splits whole documents at once
+    chunk_token_encoding: str = ""  # tiktoken encoding for token_count, if set
+    # Gemini model name, or "local:<sentence-transformers model>" for CPU
+    # embeddings. embedding_dimension sizes the vector columns and must match.
     embedding_model: str = "models/embedding-001"
+    embedding_dimension: int = 3072
     llm_model: str = "gemini-1.5-flash"
+    llm_max_concurrency: int = 32
+    llm_timeout_seconds: float = 60.0
+    llm_max_retries: int = 2
+    pdf_parallel_page_threshold: int = 64
+    pdf_parse_workers: int = 0  # 0 = one per CPU
+    txt_read_block_chars: int = 1024 * 1024
+    embedding_max_concurrency: int = 16
+    embedding_timeout_seconds: float = 10.0
+
+    # Worker embedding batches
+    embedding_batch_size: int = 100
+    embedding_max_inflight_batches: int = 4
+    embedding_chunks_per_task: int = 400
+    embedding_requests_per_minute: int = 600  # shared by all workers via Redis
+    embedding_max_retries: int = 6
+    embedding_backoff_base_seconds: float = 1.0
+    embedding_backoff_max_seconds: float = 60.0
+
+    # Local embedding provider
+    local_embedding_backend: str = "onnx"  # or "torch"
+    local_embedding_batch_size: int = 64
+    local_embedding_workers: int = 0  # 0 = run in-process
+
+    # Chunk persistence
+    chunk_write_method: str = "copy"  # or "executemany"
+    chunk_insert_batch_size: int = 1000
+
+    # Query embedding cache
+    query_cache_size: int = 2048
+    query_cache_ttl_seconds: float = 3600
+    query_cache_redis_enabled: bool = True
+    query_cache_redis_ttl_seconds: int = 86400
+    query_cache_dtype: str = "float32"  # or "float16"
+
+    # Chat response cache
+    response_cache_enabled: bool = True
+    response_cache_max_distance: float = 0.05
+    response_cache_ttl_seconds: int = 86400
+    response_cache_max_entries: int = 200
+
+    # Processing status stream
+    progress_snapshot_ttl_seconds: int = 86400
+    progress_heartbeat_seconds: float = 15.0
+    progress_stream_max_documents: int = 100
+
+    # Vector search
+    hnsw_ef_search: int = 100
+    # Keeps filtered ANN queries full; needs pgvector >= 0.8, set "off" on older
+    hnsw_iterative_scan: Literal["off", "strict_order", "relaxed_order"] = (
+        "relaxed_order"
+    )
+    ann_candidate_multiplier: int = 4
+    hybrid_candidates: int = 50
+    hybrid_rrf_k: int = 60
+    multi_doc_top_k: int = 8
+    multi_doc_per_document_limit: int = 3
+
+    # In-process vector cache for hot documents (per API process)
+    vector_cache_enabled: bool = False
+    vector_cache_max_mb: int = 512
+    vector_cache_dtype: str = "float32"  # or "float16"
+
+    # Chat context assembly
+    context_candidates: int = 20
+    context_token_budget: int = 3000
+    context_chars_per_token: float = 4.0  # token estimate without a tokenizer
+    mmr_lambda: float = 0.7  # 1.0 = pure relevance, 0.0 = pure diversity
+
+    # Observability (needs prometheus-client / opentelemetry-sdk installed)
+    metrics_enabled: bool = False
+    # Directory shared by the processes of one server (Celery prefork pool,
+    # several uvicorn workers) so their metrics are aggregated
+    prometheus_multiproc_dir: str = ""
+    worker_metrics_port: int = 9101  # 0 = no worker metrics server
+    tracing_enabled: bool = False
+    otel_exporter_otlp_endpoint: str = ""  # empty = OTEL_EXPORTER_OTLP_* env
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -1,7 +1,11 @@
-from app.core.parsing import parse_document
-from app.core.chunking import chunk_text
+from app.core.parsing import parse_document, parse_document_pages, iter_document_pages
+from app.core.chunking import chunk_text, iter_chunks
 from app.core.embeddings import generate_embeddings
-from app.core.retrieval import search_similar_chunks
+from app.core.retrieval import (
+    search_similar_chunks,
+    search_chunks_lexical,
+    search_chunks_hybrid,
+)
 from app.core.prompts import (
     build_chat_prompt,
     build_summary_prompt,
@@ -11,9 +15,14 @@ from app.core.llm import generate_response, generate_response_stream
 
 __all__ = [
     "parse_document",
+    "parse_document_pages",
+    "iter_document_pages",
     "chunk_text",
+    "iter_chunks",
     "generate_embeddings",
     "search_similar_chunks",
+    "search_chunks_lexical",
+    "search_chunks_hybrid",
     "build_chat_prompt",
     "build_summary_prompt",
     "build_classification_prompt",
@@ -1,28 +1,290 @@
+import hashlib
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from app.config import get_settings
 
 settings = get_settings()
 
+# Boundaries to split at, in order of preference
+SEPARATORS = ["\n\n", "\n", ". ", " "]
 
-def chunk_text(text: str) -> list[dict]:
+
+class TextChunker:
     """
-    Split text into chunks for embedding.
-    Returns list of dicts with content and metadata.
+    Separator-priority text splitter working in one linear pass.
+
+    Each chunk ends after the last occurrence of the most preferred
+    separator that fits in `chunk_size` characters from its start, falling
+    back to a hard cut. The next chunk starts at the earliest preferred
+    boundary within the last `chunk_overlap` characters, so neighbours
+    share up to that much text. Chunks are located by offsets into the
+    text and stripped of surrounding whitespace; only their content is
+    copied.
+
+    This matches the boundaries of LangChain's recursive splitter with the
+    same separators closely, except that ". " stays with the sentence it
+    ends rather than starting the next chunk. A chunk's boundaries depend
+    only on the `chunk_size` characters after its start, which lets
+    `iter_chunks` split a stream exactly like the whole text.
     """
-    splitter = RecursiveCharacterTextSplitter(
+
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int,
+        separators: list[str] | None = None,
+        token_counter: Callable[[str], int] | None = None,
+    ):
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = SEPARATORS if separators is None else separators
+        self.token_counter = token_counter
+
+    def _chunk_end(self, text: str, start: int, covered: int) -> int:
+        limit = start + self.chunk_size
+        if limit >= len(text):
+            return len(text)
+        # Reach past the previous chunk, or this one would be inside it
+        floor = max(start + 1, covered)
+        for separator in self.separators:
+            at = text.rfind(separator, floor, limit)
+            if at != -1:
+                return at + len(separator)
+        return limit
+
+    def _next_start(self, text: str, start: int, end: int) -> int:
+        floor = max(end - self.chunk_overlap, start + 1)
+        if floor >= end:
+            return end
+        for separator in self.separators:
+            at = text.find(separator, floor, end)
+            if at != -1 and at + len(separator) < end:
+                return at + len(separator)
+        # Cut inside a word: overlap by characters
+        return floor if end == start + self.chunk_size else end
+
+    def spans(
+        self, text: str, start: int = 0, covered: int = 0, final: bool = True
+    ) -> Iterator[tuple[int, int]]:
+        """
+        Yield (start, end) offsets of the chunks of text[start:], where
+        text[:covered] was already covered by earlier chunks.
+
+        With `final=False` the text may continue, so chunks are only yielded
+        once they cannot change; the generator then returns the (start,
+        covered) offsets from which splitting must resume.
+        """
+        length = len(text)
+        while True:
+            while start < length and text[start].isspace():
+                start += 1
+            if start >= length or (not final and start + self.chunk_size >= length):
+                return start, covered
+
+            end = self._chunk_end(text, start, covered)
+            stripped_end = end
+            while text[stripped_end - 1].isspace():
+                stripped_end -= 1
+            yield start, stripped_end
+
+            if end >= length:
+                return end, end
+            start, covered = self._next_start(text, start, end), end
+
+    def chunk(self, text: str, start: int, end: int, offset: int = 0) -> dict:
+        """Chunk dict for text[start:end], at `offset` in the whole document."""
+        content = text[start:end]
+        chunk = {
+            "content": content,
+            "char_count": len(content),
+            "char_start": offset + start,
+            "char_end": offset + end,
+        }
+        if self.token_counter is not None:
+            chunk["token_count"] = self.token_counter(content)
+        return chunk
+
+
+@lru_cache
+def _get_token_counter() -> Callable[[str], int] | None:
+    """Token counter for `chunk_token_encoding`, or None when not configured."""
+    if not settings.chunk_token_encoding:
+        return None
+    try:
+        import tiktoken
+    except ImportError as e:
+        raise RuntimeError(
+            "Counting chunk tokens needs tiktoken: pip install tiktoken"
+        ) from e
+    encoding = tiktoken.get_encoding(settings.chunk_token_encoding)
+    return lambda text: len(encoding.encode_ordinary(text))
+
+
+@lru_cache
+def get_chunker() -> TextChunker:
+    """Get the shared chunker."""
+    return TextChunker(
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
+        token_counter=_get_token_counter(),
+    )
+
+
+@lru_cache
+def _get_splitter() -> RecursiveCharacterTextSplitter:
+    """Get the shared text splitter."""
+    return RecursiveCharacterTextSplitter(
         chunk_size=settings.chunk_size,
         chunk_overlap=settings.chunk_overlap,
         length_function=len,
         separators=["\n\n", "\n", ". ", " ", ""],
+        add_start_index=True,
     )
 
-    chunks = splitter.split_text(text)
 
+def chunk_hash(content: str) -> str:
+    """SHA-256 of chunk text, used to share embeddings across documents."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def chunk_text(text: str) -> list[dict]:
+    """
+    Split text into chunks for embedding.
+    Returns list of dicts with content and metadata (character count and
+    offsets, and token count if `chunk_token_encoding` is set).
+    """
+    if settings.chunker == "langchain":
+        return _chunk_text_langchain(text)
+
+    chunker = get_chunker()
     return [
-        {
-            "content": chunk,
-            "chunk_index": i,
-            "char_count": len(chunk),
-        }
-        for i, chunk in enumerate(chunks)
+        {"chunk_index": i, **chunker.chunk(text, start, end)}
+        for i, (start, end) in enumerate(chunker.spans(text))
     ]
+
+
+def _chunk_text_langchain(text: str) -> list[dict]:
+    chunks = []
+    for i, document in enumerate(_get_splitter().create_documents([text])):
+        start = document.metadata["start_index"]
+        chunks.append(
+            {
+                "content": document.page_content,
+                "chunk_index": i,
+                "char_count": len(document.page_content),
+                "char_start": start,
+                "char_end": start + len(document.page_content),
+            }
+        )
+    return chunks
+
+
+class _PageIndex:
+    """Maps character offsets of the joined page text to page numbers."""
+
+    def __init__(self):
+        self.offsets: list[int] = []  # absolute offset where each page starts
+        self.numbers: list[int] = []
+
+    def add(self, offset: int, page_number: int) -> None:
+        self.offsets.append(offset)
+        self.numbers.append(page_number)
+
+    def page_at(self, offset: int) -> int:
+        return self.numbers[bisect_right(self.offsets, offset) - 1]
+
+    def discard_before(self, offset: int) -> None:
+        keep_from = max(bisect_right(self.offsets, offset) - 1, 0)
+        del self.offsets[:keep_from]
+        del self.numbers[:keep_from]
+
+
+def iter_chunks(pages: Iterable[dict]) -> Iterator[dict]:
+    """
+    Split a stream of pages into chunks, yielding them as soon as they are
+    final. Only the text after the last final chunk is held in memory, and
+    chunks come out exactly as `chunk_text` would split the joined pages.
+
+    Pages are dicts with page_number and text, as produced by
+    `iter_document_pages`. Chunks carry page_start and page_end, and
+    character offsets into the pages joined as by `join_pages`.
+    """
+    if settings.chunker == "langchain":
+        yield from _iter_chunks_langchain(pages)
+        return
+
+    chunker = get_chunker()
+    page_index = _PageIndex()
+    buffer = ""
+    buffer_offset = 0  # absolute character offset of buffer[0]
+    covered = 0  # buffer offset up to which chunks were emitted
+    previous_page = None
+    chunk_index = 0
+
+    def split(final: bool) -> Iterator[dict]:
+        nonlocal buffer, buffer_offset, covered, chunk_index
+        spans = chunker.spans(buffer, covered=covered, final=final)
+        while True:
+            try:
+                start, end = next(spans)
+            except StopIteration as stop:
+                resume, covered = stop.value
+                break
+            chunk = chunker.chunk(buffer, start, end, buffer_offset)
+            chunk["chunk_index"] = chunk_index
+            chunk["page_start"] = page_index.page_at(chunk["char_start"])
+            chunk["page_end"] = page_index.page_at(chunk["char_end"] - 1)
+            chunk_index += 1
+            yield chunk
+        buffer = buffer[resume:]
+        buffer_offset += resume
+        covered -= resume
+        page_index.discard_before(buffer_offset)
+
+    for page in pages:
+        if not page["text"]:
+            continue
+        if previous_page is not None and page["page_number"] != previous_page:
+            buffer += "\n\n"
+        if page["page_number"] != previous_page:
+            page_index.add(buffer_offset + len(buffer), page["page_number"])
+        previous_page = page["page_number"]
+        buffer += page["text"]
+
+        if len(buffer) > chunker.chunk_size * 2:
+            yield from split(final=False)
+
+    yield from split(final=True)
+
+
+def _iter_chunks_langchain(pages: Iterable[dict]) -> Iterator[dict]:
+    """
+    `iter_chunks` with LangChain's splitter. Its boundaries depend on the
+    whole text (it splits on the first separator found anywhere in it, then
+    recurses), so the pages are joined and split at once rather than
+    streamed; the "fast" chunker keeps memory bounded instead.
+    """
+    page_index = _PageIndex()
+    parts = []
+    length = 0
+    previous_page = None
+    for page in pages:
+        if not page["text"]:
+            continue
+        if previous_page is not None and page["page_number"] != previous_page:
+            parts.append("\n\n")
+            length += 2
+        if page["page_number"] != previous_page:
+            page_index.add(length, page["page_number"])
+        previous_page = page["page_number"]
+        parts.append(page["text"])
+        length += len(page["text"])
+
+    for chunk in _chunk_text_langchain("".join(parts)):
+        chunk["page_start"] = page_index.page_at(chunk["char_start"])
+        chunk["page_end"] = page_index.page_at(chunk["char_end"] - 1)
+        yield chunk
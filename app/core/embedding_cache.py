@@ -0,0 +1,206 @@
+import hashlib
+import logging
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+import redis.asyncio as aioredis
+
+from app.config import get_settings
+from app.core.redis_client import get_async_redis, get_redis
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# struct format characters for the Redis value encoding
+_DTYPE_FORMATS = {"float16": "e", "float32": "f"}
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query text so trivially different phrasings share a key."""
+    return " ".join(query.lower().split())
+
+
+class QueryEmbeddingCache:
+    """
+    Two-tier cache for query embeddings.
+
+    Tier 1 is an in-process LRU bounded by size and TTL. Tier 2 is Redis,
+    shared across API replicas, with vectors stored as packed little-endian
+    float16/float32 bytes. Redis errors are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        use_redis: bool,
+        redis_ttl_seconds: int,
+        dtype: str = "float32",
+    ):
+        if dtype not in _DTYPE_FORMATS:
+            raise ValueError(f"Unsupported cache dtype: {dtype}")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.use_redis = use_redis
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.dtype = dtype
+
+        self._entries: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def key(self, query: str) -> str:
+        """Build the cache key from the embedding model and normalized query."""
+        digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+        return f"qemb:{settings.embedding_model}:{digest}"
+
+    # Encoding
+
+    def _encode(self, embedding: list[float]) -> bytes:
+        fmt = _DTYPE_FORMATS[self.dtype]
+        return struct.pack(f"<{len(embedding)}{fmt}", *embedding)
+
+    def _decode(self, data: bytes) -> list[float]:
+        fmt = _DTYPE_FORMATS[self.dtype]
+        count = len(data) // struct.calcsize(fmt)
+        return list(struct.unpack(f"<{count}{fmt}", data))
+
+    # In-process tier
+
+    def _get_local(self, key: str) -> list[float] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, embedding = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return embedding
+
+    def _set_local(self, key: str, embedding: list[float]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    # Redis clients
+
+    def _get_redis(self) -> redis.Redis | None:
+        return get_redis() if self.use_redis else None
+
+    def _get_aredis(self) -> aioredis.Redis | None:
+        return get_async_redis() if self.use_redis else None
+
+    # Public API
+
+    def get(self, query: str) -> list[float] | None:
+        """Look up a query embedding (sync)."""
+        key = self.key(query)
+        embedding = self._get_local(key)
+        if embedding is not None:
+            self.local_hits += 1
+            return embedding
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                data = client.get(key)
+            except redis.RedisError as e:
+                logger.warning("Query embedding cache read failed: %s", e)
+                data = None
+            if data is not None:
+                embedding = self._decode(data)
+                self._set_local(key, embedding)
+                self.redis_hits += 1
+                return embedding
+
+        self.misses += 1
+        return None
+
+    def set(self, query: str, embedding: list[float]) -> None:
+        """Store a query embedding in both tiers (sync)."""
+        key = self.key(query)
+        self._set_local(key, embedding)
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                client.set(key, self._encode(embedding), ex=self.redis_ttl_seconds)
+            except redis.RedisError as e:
+                logger.warning("Query embedding cache write failed: %s", e)
+
+    async def aget(self, query: str) -> list[float] | None:
+        """Look up a query embedding (async)."""
+        key = self.key(query)
+        embedding = self._get_local(key)
+        if embedding is not None:
+            self.local_hits += 1
+            return embedding
+
+        client = self._get_aredis()
+        if client is not None:
+            try:
+                data = await client.get(key)
+            except redis.RedisError as e:
+                logger.warning("Query embedding cache read failed: %s", e)
+                data = None
+            if data is not None:
+                embedding = self._decode(data)
+                self._set_local(key, embedding)
+                self.redis_hits += 1
+                return embedding
+
+        self.misses += 1
+        return None
+
+    async def aset(self, query: str, embedding: list[float]) -> None:
+        """Store a query embedding in both tiers (async)."""
+        key = self.key(query)
+        self._set_local(key, embedding)
+
+        client = self._get_aredis()
+        if client is not None:
+            try:
+                await client.set(
+                    key, self._encode(embedding), ex=self.redis_ttl_seconds
+                )
+            except redis.RedisError as e:
+                logger.warning("Query embedding cache write failed: %s", e)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for both tiers."""
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+            "local_size": len(self._entries),
+        }
+
+
+_query_cache: QueryEmbeddingCache | None = None
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Get or create the process-wide query embedding cache."""
+    global _query_cache
+    if _query_cache is None:
+        _query_cache = QueryEmbeddingCache(
+            max_size=settings.query_cache_size,
+            ttl_seconds=settings.query_cache_ttl_seconds,
+            use_redis=settings.query_cache_redis_enabled,
+            redis_ttl_seconds=settings.query_cache_redis_ttl_seconds,
+            dtype=settings.query_cache_dtype,
+        )
+    return _query_cache
@@ -0,0 +1,222 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import cached_property
+from typing import Callable
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Prefix of `embedding_model` selecting the local provider,
+# e.g. "local:sentence-transformers/all-MiniLM-L6-v2"
+LOCAL_PREFIX = "local:"
+
+# Output sizes of Google embedding models; others default to
+# `embedding_dimension` and are checked against their first response
+GOOGLE_DIMENSIONS = {
+    "models/gemini-embedding-001": 3072,
+    "models/text-embedding-004": 768,
+}
+
+
+def _dimension_mismatch(dimension: int) -> ValueError:
+    return ValueError(
+        f"{settings.embedding_model} produces {dimension}-dimensional vectors "
+        f"but embedding_dimension is {settings.embedding_dimension}; "
+        "update it and run python -m app.workers.resize_embeddings"
+    )
+
+
+class EmbeddingProvider(ABC):
+    """
+    Interface of an embedding backend.
+
+    `remote` providers are rate limited and retried on throttling; local
+    ones run as fast as the CPU allows.
+    """
+
+    name: str = ""
+    remote: bool = True
+
+    def __init__(self, model: str):
+        self.model = model
+        self._dimension_checked = False
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        """Length of the vectors the model produces."""
+
+    @abstractmethod
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts for storage and search."""
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    def check_dimension(self, vector: list[float]) -> None:
+        """
+        Raise ValueError if a returned vector does not fit the database
+        columns. Only the first response is checked.
+        """
+        if self._dimension_checked:
+            return
+        if len(vector) != settings.embedding_dimension:
+            raise _dimension_mismatch(len(vector))
+        self._dimension_checked = True
+
+
+class GoogleEmbeddingProvider(EmbeddingProvider):
+    """Gemini embeddings through the Google Generative AI API."""
+
+    name = "google"
+
+    def __init__(self, model: str):
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        super().__init__(model)
+        self._client = GoogleGenerativeAIEmbeddings(
+            model=model,
+            google_api_key=settings.google_api_key,
+        )
+
+    @property
+    def dimension(self) -> int:
+        # The API does not report it; unknown models are checked on first use
+        return GOOGLE_DIMENSIONS.get(self.model, settings.embedding_dimension)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._client.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._client.embed_query(text)
+
+
+def _load_sentence_transformer(model: str):
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError as e:
+        raise RuntimeError(
+            "Local embeddings need sentence-transformers: "
+            "pip install 'sentence-transformers[onnx]'"
+        ) from e
+    return SentenceTransformer(
+        model, device="cpu", backend=settings.local_embedding_backend
+    )
+
+
+def _dimension(model) -> int:
+    return model.get_sentence_embedding_dimension()
+
+
+def _encode(model, texts: list[str]) -> list[list[float]]:
+    return model.encode(
+        texts,
+        batch_size=settings.local_embedding_batch_size,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+    ).tolist()
+
+
+# Model loaded once per pool worker process
+_worker_model = None
+
+
+def _init_worker(model: str) -> None:
+    global _worker_model
+    _worker_model = _load_sentence_transformer(model)
+
+
+def _call_in_worker(func: Callable, *args):
+    return func(_worker_model, *args)
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    CPU embeddings with sentence-transformers, on the ONNX Runtime backend
+    by default. Needs the optional `sentence-transformers[onnx]` package.
+
+    With `local_embedding_workers` > 0, batches run in a pool of processes
+    that each hold a copy of the model. Otherwise, or where processes cannot
+    be spawned, they run in-process one at a time, each batch still using
+    every core through ONNX Runtime's intra-op threads. The model is loaded
+    where it first runs, so a process using the pool never loads its own.
+    """
+
+    name = "local"
+    remote = False
+
+    def __init__(self, model: str):
+        super().__init__(model)
+        self._model = None
+        # Tokenizers are not safe to call from several threads at once
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        if settings.local_embedding_workers > 0:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.local_embedding_workers,
+                initializer=_init_worker,
+                initargs=(model,),
+            )
+
+    def _run(self, func: Callable, *args):
+        """Call `func(model, *args)` in the pool, or in-process without one."""
+        if self._pool is not None:
+            try:
+                return self._pool.submit(_call_in_worker, func, *args).result()
+            except (OSError, AssertionError, BrokenProcessPool) as e:
+                # e.g. daemonic Celery worker processes may not spawn children
+                logger.warning("Embedding process pool unavailable: %s", e)
+                self._pool = None
+
+        with self._lock:
+            if self._model is None:
+                self._model = _load_sentence_transformer(self.model)
+            return func(self._model, *args)
+
+    @cached_property
+    def dimension(self) -> int:
+        return self._run(_dimension)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._run(_encode, texts)
+
+
+_PROVIDERS = {
+    GoogleEmbeddingProvider.name: GoogleEmbeddingProvider,
+    LocalEmbeddingProvider.name: LocalEmbeddingProvider,
+}
+
+
+def parse_embedding_model(embedding_model: str) -> tuple[str, str]:
+    """Split `embedding_model` into (provider name, model name)."""
+    if embedding_model.startswith(LOCAL_PREFIX):
+        return LocalEmbeddingProvider.name, embedding_model[len(LOCAL_PREFIX) :]
+    return GoogleEmbeddingProvider.name, embedding_model
+
+
+_provider: EmbeddingProvider | None = None
+_provider_lock = threading.Lock()
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """
+    Get the process-wide provider selected by `embedding_model`, creating it
+    once even when first called from several threads.
+
+    Raises ValueError if its vectors do not match `embedding_dimension`,
+    the dimension of the database columns.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            name, model = parse_embedding_model(settings.embedding_model)
+            provider = _PROVIDERS[name](model)
+            if provider.dimension != settings.embedding_dimension:
+                raise _dimension_mismatch(provider.dimension)
+            _provider = provider
+        return _provider
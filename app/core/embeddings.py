@@ -1,20 +1,130 @@
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable
+
+import redis
+
 from app.config import get_settings
+from app.core import telemetry
+from app.core.embedding_cache import get_query_embedding_cache
+from app.core.embedding_providers import get_embedding_provider
+from app.core.redis_client import get_redis
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY = "ratelimit:embeddings"
+
+# Refills and takes a token atomically on Redis's clock. Returns the seconds
+# to wait before retrying, 0 once a token was taken; as a string, since Lua
+# numbers are truncated to integers on return.
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call("HMGET", KEYS[1], "tokens", "updated_at")
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "updated_at", now)
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+_query_semaphore: asyncio.Semaphore | None = None
+_rate_limiter = None
+
+
+def _get_query_semaphore() -> asyncio.Semaphore:
+    """Get or create the semaphore bounding in-flight query embeddings."""
+    global _query_semaphore
+    if _query_semaphore is None:
+        _query_semaphore = asyncio.Semaphore(settings.embedding_max_concurrency)
+    return _query_semaphore
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting how often requests may start."""
+
+    def __init__(self, rate_per_minute: int, capacity: int | None = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, rate_per_minute // 60)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
 
-_embeddings_model = None
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate
+            time.sleep(wait_seconds)
 
 
-def get_embeddings_model() -> GoogleGenerativeAIEmbeddings:
-    """Get or create embeddings model instance."""
-    global _embeddings_model
-    if _embeddings_model is None:
-        _embeddings_model = GoogleGenerativeAIEmbeddings(
-            model=settings.embedding_model,
-            google_api_key=settings.google_api_key,
+class RedisTokenBucket(TokenBucket):
+    """
+    Token bucket kept in Redis, so all worker processes share one budget.
+    While Redis is unreachable each process falls back to its own bucket.
+    """
+
+    def __init__(self, key: str, rate_per_minute: int, capacity: int | None = None):
+        super().__init__(rate_per_minute, capacity)
+        self.key = key
+        self._script = get_redis().register_script(_TOKEN_BUCKET_SCRIPT)
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        while True:
+            try:
+                wait_seconds = float(
+                    self._script(keys=[self.key], args=[self.rate, self.capacity])
+                )
+            except redis.RedisError as e:
+                logger.warning("Shared rate limiter unavailable: %s", e)
+                super().acquire()
+                return
+            if wait_seconds <= 0:
+                return
+            time.sleep(wait_seconds)
+
+
+def get_rate_limiter() -> TokenBucket:
+    """Get or create the cluster-wide embedding request rate limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RedisTokenBucket(
+            RATE_LIMIT_KEY, settings.embedding_requests_per_minute
         )
-    return _embeddings_model
+    return _rate_limiter
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """Whether an embedding API error signals throttling (HTTP 429)."""
+    message = str(exc)
+    return (
+        type(exc).__name__ == "ResourceExhausted"
+        or "429" in message
+        or "RESOURCE_EXHAUSTED" in message
+    )
 
 
 def generate_embeddings(texts: list[str]) -> list[list[float]]:
@@ -22,11 +132,134 @@ def generate_embeddings(texts: list[str]) -> list[list[float]]:
     Generate embeddings for a list of texts.
     Returns list of embedding vectors.
     """
-    model = get_embeddings_model()
-    return model.embed_documents(texts)
+    provider = get_embedding_provider()
+    telemetry.EMBEDDING_TEXTS.labels(provider.name).inc(len(texts))
+    with telemetry.timed(
+        telemetry.EMBEDDING_REQUEST_SECONDS, provider=provider.name, kind="documents"
+    ):
+        embeddings = provider.embed_documents(texts)
+    if embeddings:
+        provider.check_dimension(embeddings[0])
+    return embeddings
+
+
+def _embed_query(query: str) -> list[float]:
+    """Call the embedding provider for a single query, bypassing the cache."""
+    provider = get_embedding_provider()
+    telemetry.EMBEDDING_TEXTS.labels(provider.name).inc()
+    with telemetry.timed(
+        telemetry.EMBEDDING_REQUEST_SECONDS, provider=provider.name, kind="query"
+    ):
+        embedding = provider.embed_query(query)
+    provider.check_dimension(embedding)
+    return embedding
 
 
 def generate_query_embedding(query: str) -> list[float]:
-    """Generate embedding for a single query."""
-    model = get_embeddings_model()
-    return model.embed_query(query)
+    """Generate embedding for a single query, served from cache when possible."""
+    cache = get_query_embedding_cache()
+    embedding = cache.get(query)
+    telemetry.record_cache("query_embedding", embedding is not None)
+    if embedding is None:
+        embedding = _embed_query(query)
+        cache.set(query, embedding)
+    return embedding
+
+
+async def generate_query_embedding_async(query: str) -> list[float]:
+    """
+    Generate embedding for a single query without blocking the event loop.
+    Concurrency is bounded by `embedding_max_concurrency` provider calls,
+    including ones that timed out but are still running; raises
+    `TimeoutError` if the call exceeds `embedding_timeout_seconds`.
+    """
+    cache = get_query_embedding_cache()
+    embedding = await cache.aget(query)
+    telemetry.record_cache("query_embedding", embedding is not None)
+    if embedding is not None:
+        return embedding
+
+    semaphore = _get_query_semaphore()
+    await semaphore.acquire()
+    call = asyncio.ensure_future(asyncio.to_thread(_embed_query, query))
+
+    def release(finished: asyncio.Future) -> None:
+        semaphore.release()
+        if not finished.cancelled():
+            finished.exception()  # retrieved, as a timed-out caller won't
+
+    # The thread can't be interrupted, so its slot is only freed once the
+    # provider call returns, even if the caller stopped waiting for it
+    call.add_done_callback(release)
+    embedding = await asyncio.wait_for(
+        asyncio.shield(call), timeout=settings.embedding_timeout_seconds
+    )
+    await cache.aset(query, embedding)
+    return embedding
+
+
+def _embed_batch_with_backoff(texts: list[str]) -> list[list[float]]:
+    """Embed one batch, backing off exponentially while the API throttles."""
+    if not get_embedding_provider().remote:
+        return generate_embeddings(texts)
+
+    limiter = get_rate_limiter()
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            return generate_embeddings(texts)
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt >= settings.embedding_max_retries:
+                raise
+        delay = min(
+            settings.embedding_backoff_base_seconds * (2**attempt),
+            settings.embedding_backoff_max_seconds,
+        )
+        time.sleep(delay + random.uniform(0, settings.embedding_backoff_base_seconds))
+        attempt += 1
+
+
+def generate_embeddings_batched(
+    texts: list[str],
+    on_batch: Callable[[int, list[list[float]]], None],
+    batch_size: int | None = None,
+    max_inflight: int | None = None,
+) -> None:
+    """
+    Embed texts in batches with several requests in flight at once.
+
+    `on_batch(start, embeddings)` is called from the calling thread as each
+    batch completes (not necessarily in order), so callers can persist
+    progress incrementally. On failure, outstanding batches are cancelled and
+    the error is raised; batches already handed to `on_batch` are kept.
+    """
+    batch_size = batch_size or settings.embedding_batch_size
+    max_inflight = max_inflight or settings.embedding_max_inflight_batches
+    # Create the provider here rather than in the first worker threads
+    get_embedding_provider()
+    starts = iter(range(0, len(texts), batch_size))
+
+    with ThreadPoolExecutor(max_workers=max_inflight) as executor:
+        pending: dict[Future, int] = {}
+
+        def submit_next() -> None:
+            start = next(starts, None)
+            if start is not None:
+                batch = texts[start : start + batch_size]
+                pending[executor.submit(_embed_batch_with_backoff, batch)] = start
+
+        for _ in range(max_inflight):
+            submit_next()
+
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start = pending.pop(future)
+                    on_batch(start, future.result())
+                    submit_next()
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
@@ -1,46 +1,92 @@
+import asyncio
+import threading
+import time
+from functools import lru_cache
 from typing import AsyncIterator
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, SystemMessage
 from app.config import get_settings
+from app.core import telemetry
 
 settings = get_settings()
 
+# Bounds on concurrent LLM calls: one semaphore per calling style, since the
+# async chat path and the sync worker path never share a thread.
+_sync_semaphore = threading.BoundedSemaphore(settings.llm_max_concurrency)
+_async_semaphore: asyncio.Semaphore | None = None
 
-def get_llm() -> ChatGoogleGenerativeAI:
-    """Get LLM instance."""
+
+@lru_cache(maxsize=16)
+def _get_cached_llm(model: str, temperature: float) -> ChatGoogleGenerativeAI:
     return ChatGoogleGenerativeAI(
-        model=settings.llm_model,
+        model=model,
         google_api_key=settings.google_api_key,
-        temperature=0.7,
+        temperature=temperature,
+        timeout=settings.llm_timeout_seconds,
+        max_retries=settings.llm_max_retries,
     )
 
 
-def generate_response(prompt: str, system_prompt: str | None = None) -> str:
-    """Generate a response from the LLM."""
-    llm = get_llm()
+def get_llm(
+    model: str | None = None, temperature: float = 0.7
+) -> ChatGoogleGenerativeAI:
+    """
+    Get the shared LLM client for a (model, temperature) configuration.
+    Clients are created once per process and reused, so their underlying
+    connections stay open between calls.
+    """
+    return _get_cached_llm(model or settings.llm_model, temperature)
+
+
+def _get_async_semaphore() -> asyncio.Semaphore:
+    """Get or create the semaphore bounding in-flight async LLM calls."""
+    global _async_semaphore
+    if _async_semaphore is None:
+        _async_semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+    return _async_semaphore
+
+
+def _build_messages(prompt: str, system_prompt: str | None) -> list:
     messages = []
 
     if system_prompt:
         messages.append(SystemMessage(content=system_prompt))
 
     messages.append(HumanMessage(content=prompt))
+    return messages
 
-    response = llm.invoke(messages)
+
+def generate_response(prompt: str, system_prompt: str | None = None) -> str:
+    """Generate a response from the LLM."""
+    llm = get_llm()
+    messages = _build_messages(prompt, system_prompt)
+
+    with _sync_semaphore, telemetry.timed(
+        telemetry.LLM_REQUEST_SECONDS, "llm.invoke", mode="invoke"
+    ):
+        response = llm.invoke(messages)
     return response.content
 
 
 async def generate_response_stream(
     prompt: str, system_prompt: str | None = None
 ) -> AsyncIterator[str]:
-    """Stream response from the LLM."""
+    """
+    Stream response from the LLM. Time to first token is measured from when
+    the call gets past the concurrency limit.
+    """
     llm = get_llm()
-    messages = []
-
-    if system_prompt:
-        messages.append(SystemMessage(content=system_prompt))
-
-    messages.append(HumanMessage(content=prompt))
+    messages = _build_messages(prompt, system_prompt)
 
-    async for chunk in llm.astream(messages):
-        if chunk.content:
-            yield chunk.content
+    async with _get_async_semaphore():
+        with telemetry.timed(telemetry.LLM_REQUEST_SECONDS, mode="stream"):
+            started = time.perf_counter()
+            first_token = True
+            async for chunk in llm.astream(messages):
+                if chunk.content:
+                    if first_token:
+                        telemetry.LLM_FIRST_TOKEN_SECONDS.observe(
+                            time.perf_counter() - started
+                        )
+                        first_token = False
+                    yield chunk.content
@@ -0,0 +1,170 @@
+import json
+import logging
+import time
+import uuid
+from typing import AsyncIterator
+
+import redis
+
+from app.config import get_settings
+from app.core.redis_client import get_async_redis, get_redis
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Overall percent complete at the start of each stage. Embedding dominates
+# processing time, so it covers most of the range.
+STAGE_PERCENT = {
+    "queued": 0,
+    "parsing": 2,
+    "embedding": 10,
+    "finalizing": 95,
+    "completed": 100,
+}
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+def _channel(document_id: uuid.UUID | str) -> str:
+    return f"docprogress:{document_id}"
+
+
+def _snapshot_key(document_id: uuid.UUID | str) -> str:
+    return f"docprogress:last:{document_id}"
+
+
+def _counts_key(document_id: uuid.UUID | str) -> str:
+    return f"docprogress:counts:{document_id}"
+
+
+def _publish(document_id: str, event: dict) -> None:
+    """Store the latest event for late subscribers and broadcast it."""
+    payload = json.dumps(event)
+    try:
+        with get_redis().pipeline(transaction=False) as pipe:
+            pipe.set(
+                _snapshot_key(document_id),
+                payload,
+                ex=settings.progress_snapshot_ttl_seconds,
+            )
+            pipe.publish(_channel(document_id), payload)
+            pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Progress publish failed: %s", e)
+
+
+def publish_progress(
+    document_id: str,
+    stage: str,
+    status: str = "processing",
+    **detail,
+) -> None:
+    """
+    Publish a pipeline stage change for a document.
+
+    Progress is best effort: Redis errors are logged and never fail the
+    pipeline.
+    """
+    percent = 100 if status == "completed" else STAGE_PERCENT.get(stage)
+    _publish(
+        document_id,
+        {
+            "document_id": document_id,
+            "stage": stage,
+            "status": status,
+            "percent": percent,
+            "timestamp": time.time(),
+            **detail,
+        },
+    )
+
+
+def start_embedding(document_id: str, total: int) -> None:
+    """Reset the embedded-chunk counter before embedding tasks are dispatched."""
+    try:
+        with get_redis().pipeline(transaction=True) as pipe:
+            pipe.delete(_counts_key(document_id))
+            pipe.hset(_counts_key(document_id), mapping={"embedded": 0, "total": total})
+            pipe.expire(
+                _counts_key(document_id), settings.progress_snapshot_ttl_seconds
+            )
+            pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Progress publish failed: %s", e)
+    publish_progress(document_id, "embedding", embedded=0, total=total)
+
+
+def record_embedded(document_id: str, count: int) -> None:
+    """Add to the embedded-chunk counter shared by a document's embed tasks."""
+    try:
+        with get_redis().pipeline(transaction=True) as pipe:
+            pipe.hincrby(_counts_key(document_id), "embedded", count)
+            pipe.hget(_counts_key(document_id), "total")
+            embedded, total = pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Progress publish failed: %s", e)
+        return
+
+    total = int(total or 0)
+    start, end = STAGE_PERCENT["embedding"], STAGE_PERCENT["finalizing"]
+    fraction = min(embedded / total, 1.0) if total else 1.0
+    _publish(
+        document_id,
+        {
+            "document_id": document_id,
+            "stage": "embedding",
+            "status": "processing",
+            "percent": round(start + (end - start) * fraction, 1),
+            "timestamp": time.time(),
+            "embedded": embedded,
+            "total": total,
+        },
+    )
+
+
+async def get_percents(document_ids: list[uuid.UUID]) -> dict[str, float]:
+    """Return the latest published percent complete per document, if any."""
+    if not document_ids:
+        return {}
+    try:
+        snapshots = await get_async_redis().mget(
+            [_snapshot_key(d) for d in document_ids]
+        )
+    except redis.RedisError as e:
+        logger.warning("Progress read failed: %s", e)
+        return {}
+    percents = {}
+    for document_id, payload in zip(document_ids, snapshots):
+        if payload is not None:
+            percent = json.loads(payload)["percent"]
+            if percent is not None:
+                percents[str(document_id)] = percent
+    return percents
+
+
+async def subscribe(
+    document_ids: list[uuid.UUID], heartbeat_seconds: float
+) -> AsyncIterator[dict | None]:
+    """
+    Yield progress events for the given documents.
+
+    The latest stored event of each document comes first, read after
+    subscribing so nothing published in between is lost. Yields None when
+    nothing arrives within `heartbeat_seconds`, so callers can keep idle
+    connections alive.
+    """
+    client = get_async_redis()
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(*map(_channel, document_ids))
+        snapshots = await client.mget([_snapshot_key(d) for d in document_ids])
+        for payload in snapshots:
+            if payload is not None:
+                yield json.loads(payload)
+
+        while True:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=heartbeat_seconds
+            )
+            yield json.loads(message["data"]) if message else None
+    finally:
+        await pubsub.aclose()
@@ -1,3 +1,11 @@
+import math
+from typing import Callable
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
 def build_summary_prompt(text: str) -> str:
     """Build prompt for document summarization."""
     return f"""Please provide a comprehensive summary of the following document. 
@@ -10,9 +18,20 @@ Document:
 Summary:"""
 
 
-def build_classification_prompt(text: str, summary: str) -> str:
-    """Build prompt for document classification."""
-    return f"""Based on the following document and its summary, classify the document into one of these categories:
+def build_classification_prompt(text: str, summary: str | None = None) -> str:
+    """
+    Build prompt for document classification.
+    The summary is optional so classification can run without waiting for it.
+    """
+    if summary:
+        summary_text = f"""
+Summary:
+{summary}
+"""
+    else:
+        summary_text = ""
+
+    return f"""Based on the following document{" and its summary" if summary else ""}, classify the document into one of these categories:
 - Legal
 - Financial
 - Technical
@@ -24,16 +43,84 @@ def build_classification_prompt(text: str, summary: str) -> str:
 - Other
 
 Respond with ONLY the category name, nothing else.
-
-Summary:
-{summary}
-
+{summary_text}
 First 2000 characters of document:
 {text[:2000]}
 
 Category:"""
 
 
+def estimate_tokens(text: str) -> int:
+    """Approximate the token count of text from its length."""
+    return math.ceil(len(text) / settings.context_chars_per_token)
+
+
+def _merge_overlap(text: str, previous, chunk) -> str:
+    """
+    Append `chunk` to a passage ending with `previous`, its neighbour in the
+    document, dropping the characters their offsets say they share. Chunks
+    without offsets (or not overlapping) are joined on a new line.
+    """
+    previous_end = (previous.chunk_metadata or {}).get("char_end")
+    start = (chunk.chunk_metadata or {}).get("char_start")
+    if previous_end is None or start is None or previous_end <= start:
+        return f"{text}\n{chunk.content}"
+    return text + chunk.content[previous_end - start :]
+
+
+def build_context(
+    chunks: list,
+    token_budget: int | None = None,
+    label: Callable | None = None,
+) -> tuple[list[str], list, int]:
+    """
+    Pack ranked chunks into context passages within a token budget.
+
+    Chunks are taken in order while they fit; the first is always kept.
+    Selected chunks that are neighbours in the same document are merged
+    into one passage without their repeated overlap. Passages keep the rank
+    of their best chunk, and `label(chunk)` can prefix each with its source.
+
+    Returns the passages, the chunks used and the passages' estimated token
+    count.
+    """
+    token_budget = token_budget or settings.context_token_budget
+    used, tokens = [], 0
+    for chunk in chunks:
+        cost = estimate_tokens(chunk.content)
+        if used and tokens + cost > token_budget:
+            continue
+        used.append(chunk)
+        tokens += cost
+
+    # Group neighbouring chunks into passages, ranked by their best chunk
+    rank = {id(chunk): i for i, chunk in enumerate(used)}
+    passages: list[tuple[int, str]] = []
+    run: list = []
+    for chunk in sorted(used, key=lambda c: (str(c.document_id), c.chunk_index)):
+        if run and (
+            chunk.document_id != run[-1].document_id
+            or chunk.chunk_index != run[-1].chunk_index + 1
+        ):
+            passages.append(_passage(run, rank, label))
+            run = []
+        run.append(chunk)
+    if run:
+        passages.append(_passage(run, rank, label))
+
+    texts = [text for _, text in sorted(passages, key=lambda p: p[0])]
+    return texts, used, sum(estimate_tokens(text) for text in texts)
+
+
+def _passage(run: list, rank: dict, label: Callable | None) -> tuple[int, str]:
+    text = run[0].content
+    for previous, chunk in zip(run, run[1:]):
+        text = _merge_overlap(text, previous, chunk)
+    if label is not None:
+        text = f"{label(run[0])}\n{text}"
+    return min(rank[id(chunk)] for chunk in run), text
+
+
 def build_chat_prompt(
     query: str,
     context_chunks: list[str],
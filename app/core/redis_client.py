@@ -0,0 +1,28 @@
+from functools import lru_cache
+
+import redis
+import redis.asyncio as aioredis
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+@lru_cache
+def get_redis() -> redis.Redis:
+    """Get the shared sync Redis client."""
+    return redis.Redis.from_url(
+        settings.redis_url,
+        socket_timeout=settings.redis_socket_timeout_seconds,
+        socket_connect_timeout=settings.redis_socket_timeout_seconds,
+    )
+
+
+@lru_cache
+def get_async_redis() -> aioredis.Redis:
+    """Get the shared async Redis client."""
+    return aioredis.Redis.from_url(
+        settings.redis_url,
+        socket_timeout=settings.redis_socket_timeout_seconds,
+        socket_connect_timeout=settings.redis_socket_timeout_seconds,
+    )
@@ -0,0 +1,169 @@
+import base64
+import hashlib
+import json
+import logging
+import time
+import uuid
+
+import numpy as np
+import redis
+
+from app.config import get_settings
+from app.core import telemetry
+from app.core.redis_client import get_async_redis, get_redis
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "chatcache:stats"
+
+
+def _entries_key(document_id: uuid.UUID | str, chunk_ids: list[str]) -> str:
+    """Key of the entries answered from one set of a document's chunks."""
+    digest = hashlib.sha256("\n".join(sorted(chunk_ids)).encode("utf-8"))
+    return f"chatcache:{document_id}:{digest.hexdigest()}"
+
+
+def _index_key(document_id: uuid.UUID | str) -> str:
+    """Key of the set of a document's entry keys, for invalidation."""
+    return f"chatcache:{document_id}:keys"
+
+
+def _normalize(embedding: list[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+async def lookup_response(
+    document_id: uuid.UUID,
+    query_embedding: list[float],
+    chunk_ids: list[str],
+) -> str | None:
+    """
+    Return a cached answer for a semantically equivalent question.
+
+    A cached entry matches when its query is within
+    `response_cache_max_distance` cosine distance of this one and it was
+    answered from the same retrieved chunks. Entries are stored per set of
+    chunks, so only those that can match are read. Redis errors count as
+    misses.
+    """
+    client = get_async_redis()
+    try:
+        raw_entries = await client.lrange(_entries_key(document_id, chunk_ids), 0, -1)
+    except redis.RedisError as e:
+        logger.warning("Response cache read failed: %s", e)
+        return None
+
+    query = _normalize(query_embedding)
+    oldest = time.time() - settings.response_cache_ttl_seconds
+    best_answer, best_distance = None, settings.response_cache_max_distance
+
+    for raw in raw_entries:
+        try:
+            entry = json.loads(raw)
+            if entry["created_at"] < oldest or entry["chunk_ids"] != chunk_ids:
+                continue
+            cached = np.frombuffer(
+                base64.b64decode(entry["embedding"]), dtype=np.float32
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Skipping malformed response cache entry: %s", e)
+            continue
+        if cached.shape != query.shape:
+            continue  # cached under a different embedding model
+        distance = 1.0 - float(np.dot(query, cached))
+        if distance <= best_distance:
+            best_answer, best_distance = entry["answer"], distance
+
+    telemetry.record_cache("response", best_answer is not None)
+    try:
+        await client.hincrby(STATS_KEY, "hits" if best_answer else "misses", 1)
+    except redis.RedisError:
+        pass
+    return best_answer
+
+
+async def store_response(
+    document_id: uuid.UUID,
+    query_embedding: list[float],
+    chunk_ids: list[str],
+    answer: str,
+) -> None:
+    """
+    Cache an answer, keeping the newest `response_cache_max_entries` for
+    each set of chunks.
+    """
+    embedding_bytes = _normalize(query_embedding).tobytes()
+    entry = {
+        "embedding": base64.b64encode(embedding_bytes).decode("ascii"),
+        "chunk_ids": chunk_ids,
+        "answer": answer,
+        "created_at": time.time(),
+    }
+    key = _entries_key(document_id, chunk_ids)
+    index_key = _index_key(document_id)
+
+    try:
+        async with get_async_redis().pipeline(transaction=True) as pipe:
+            pipe.lpush(key, json.dumps(entry))
+            pipe.ltrim(key, 0, settings.response_cache_max_entries - 1)
+            pipe.expire(key, settings.response_cache_ttl_seconds)
+            pipe.sadd(index_key, key)
+            pipe.expire(index_key, settings.response_cache_ttl_seconds)
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Response cache write failed: %s", e)
+
+
+async def invalidate_document(document_id: uuid.UUID | str) -> None:
+    """Drop all cached answers for a document."""
+    await invalidate_documents([document_id])
+
+
+async def invalidate_documents(document_ids: list[uuid.UUID | str]) -> None:
+    """Drop all cached answers for several documents in two round trips."""
+    if not document_ids:
+        return
+    index_keys = [_index_key(document_id) for document_id in document_ids]
+    client = get_async_redis()
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            for index_key in index_keys:
+                pipe.smembers(index_key)
+            entry_keys = await pipe.execute()
+        await client.delete(*index_keys, *(key for keys in entry_keys for key in keys))
+    except redis.RedisError as e:
+        logger.warning("Response cache invalidation failed: %s", e)
+
+
+def invalidate_document_sync(document_id: uuid.UUID | str) -> None:
+    """Drop all cached answers for a document (sync, for workers)."""
+    index_key = _index_key(document_id)
+    client = get_redis()
+    try:
+        client.delete(index_key, *client.smembers(index_key))
+    except redis.RedisError as e:
+        logger.warning("Response cache invalidation failed: %s", e)
+
+
+async def get_stats() -> dict:
+    """
+    Return hit/miss counters shared across API replicas, zeroed and marked
+    unavailable if Redis cannot be read.
+    """
+    try:
+        counters = await get_async_redis().hgetall(STATS_KEY)
+    except redis.RedisError as e:
+        logger.warning("Response cache stats read failed: %s", e)
+        return {"hits": 0, "misses": 0, "hit_rate": 0.0, "available": False}
+    hits = int(counters.get(b"hits", 0))
+    misses = int(counters.get(b"misses", 0))
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "available": True,
+    }
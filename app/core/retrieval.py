@@ -1,9 +1,36 @@
+import asyncio
+import logging
 import uuid
-from sqlalchemy import select
+import weakref
+from datetime import datetime
+import numpy as np
+from sqlalchemy import func, literal, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import get_settings
+from app.core import telemetry
 from app.models.database import DocumentChunk
-from app.core.embeddings import generate_query_embedding
+from app.core.embeddings import generate_query_embedding_async
+from app.core.vector_cache import CachedDocument, get_document_vector_cache
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Vector cache loads in progress, so concurrent misses load a document once
+_cache_loads: weakref.WeakValueDictionary[uuid.UUID, asyncio.Lock] = (
+    weakref.WeakValueDictionary()
+)
+
+
+async def embed_query(query: str) -> list[float]:
+    """
+    Embed a search query. Callers that need the embedding themselves embed
+    once and pass it to the search functions.
+    """
+    with telemetry.timed(
+        telemetry.RETRIEVAL_SECONDS, "retrieval.query_embedding", step="query_embedding"
+    ):
+        return await generate_query_embedding_async(query)
 
 
 async def search_similar_chunks(
@@ -11,12 +38,40 @@ async def search_similar_chunks(
     document_id: uuid.UUID,
     query: str,
     top_k: int = 5,
+    updated_at: datetime | None = None,
+    query_embedding: list[float] | None = None,
 ) -> list[DocumentChunk]:
     """
     Search for similar chunks in a document using vector similarity.
+
+    With `vector_cache_enabled` and the document's `updated_at`, the search
+    runs in-process against the hot-document vector cache, loading the
+    document into it on a miss. Returned chunks are then detached from the
+    session.
     """
-    # Generate embedding for the query
-    query_embedding = generate_query_embedding(query)
+    if query_embedding is None:
+        query_embedding = await embed_query(query)
+
+    if settings.vector_cache_enabled and updated_at is not None:
+        cached = await _get_cached_document(db, document_id, updated_at)
+        if cached is not None:
+            with telemetry.timed(
+                telemetry.RETRIEVAL_SECONDS,
+                "retrieval.cached_search",
+                step="cached_search",
+            ):
+                results = cached.search(query_embedding, top_k)
+            return [
+                DocumentChunk(
+                    id=cached.chunk_ids[row],
+                    document_id=document_id,
+                    chunk_index=cached.chunk_indexes[row],
+                    content=cached.contents[row],
+                    chunk_metadata=cached.chunk_metadata[row],
+                    embedding=cached.matrix[row],
+                )
+                for row, _ in results
+            ]
 
     # Use cosine distance for similarity search
     # pgvector uses <=> for cosine distance (lower is more similar)
@@ -28,28 +83,306 @@ async def search_similar_chunks(
         .limit(top_k)
     )
 
+    with telemetry.timed(
+        telemetry.RETRIEVAL_SECONDS, "retrieval.vector_search", step="vector_search"
+    ):
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+
+async def _get_cached_document(
+    db: AsyncSession, document_id: uuid.UUID, updated_at: datetime
+) -> CachedDocument | None:
+    """
+    Get a document from the vector cache, loading it if it fits. Concurrent
+    misses for the same document wait for a single load.
+    """
+    cache = get_document_vector_cache()
+    cached = cache.get(document_id, updated_at)
+    if cached is not None or cache.is_oversized(document_id, updated_at):
+        return cached
+
+    lock = _cache_loads.setdefault(document_id, asyncio.Lock())
+    async with lock:
+        # Loaded by another request while this one waited
+        cached = cache.get(document_id, updated_at, record=False)
+        if cached is not None or cache.is_oversized(document_id, updated_at):
+            return cached
+
+        # One row past what fits tells an oversized document apart
+        max_chunks = cache.max_chunks(DocumentChunk.embedding.type.dim)
+        stmt = (
+            select(
+                DocumentChunk.id,
+                DocumentChunk.chunk_index,
+                DocumentChunk.content,
+                DocumentChunk.chunk_metadata,
+                DocumentChunk.embedding,
+            )
+            .where(DocumentChunk.document_id == document_id)
+            .where(DocumentChunk.embedding.isnot(None))
+            .order_by(DocumentChunk.chunk_index)
+            .limit(max_chunks + 1)
+        )
+        rows = (await db.execute(stmt)).all()
+        if len(rows) > max_chunks:
+            cache.mark_oversized(document_id, updated_at)
+            return None
+        if not rows:
+            return None
+        return cache.put(
+            document_id,
+            updated_at,
+            [row.id for row in rows],
+            [row.chunk_index for row in rows],
+            [row.content for row in rows],
+            [row.chunk_metadata for row in rows],
+            [row.embedding for row in rows],
+        )
+
+
+def _lexical_query(query: str):
+    return func.websearch_to_tsquery("english", query)
+
+
+def _lexical_ranked(document_id: uuid.UUID, query: str, limit: int):
+    """Select the IDs and ranks of a document's best full-text matches."""
+    tsquery = _lexical_query(query)
+    lexical_rank = func.ts_rank_cd(DocumentChunk.content_tsv, tsquery)
+    return (
+        select(
+            DocumentChunk.id.label("id"),
+            func.row_number().over(order_by=lexical_rank.desc()).label("rank"),
+        )
+        .where(DocumentChunk.document_id == document_id)
+        .where(DocumentChunk.content_tsv.op("@@")(tsquery))
+        .order_by(lexical_rank.desc())
+        .limit(limit)
+    )
+
+
+async def search_chunks_lexical(
+    db: AsyncSession,
+    document_id: uuid.UUID,
+    query: str,
+    top_k: int = 5,
+) -> list[DocumentChunk]:
+    """
+    Search for chunks in a document using PostgreSQL full-text search.
+    Catches exact identifiers (invoice numbers, clause IDs) that vector
+    similarity tends to miss.
+    """
+    ranked = _lexical_ranked(document_id, query, top_k).subquery()
+    stmt = (
+        select(DocumentChunk)
+        .join(ranked, DocumentChunk.id == ranked.c.id)
+        .order_by(ranked.c.rank)
+    )
+
     result = await db.execute(stmt)
     return list(result.scalars().all())
 
 
+async def search_chunks_hybrid(
+    db: AsyncSession,
+    document_id: uuid.UUID,
+    query: str,
+    top_k: int = 5,
+    query_embedding: list[float] | None = None,
+) -> list[DocumentChunk]:
+    """
+    Search for chunks in a document with vector and full-text search,
+    fused by reciprocal rank fusion.
+
+    Both rankings are computed as CTEs of a single statement, so they run in
+    one round-trip. Each contributes 1 / (hybrid_rrf_k + rank) for its top
+    `hybrid_candidates` chunks.
+    """
+    if query_embedding is None:
+        query_embedding = await embed_query(query)
+    distance = DocumentChunk.embedding.cosine_distance(query_embedding)
+
+    vector_ranked = (
+        select(
+            DocumentChunk.id.label("id"),
+            func.row_number().over(order_by=distance).label("rank"),
+        )
+        .where(DocumentChunk.document_id == document_id)
+        .where(DocumentChunk.embedding.isnot(None))
+        .order_by(distance)
+        .limit(settings.hybrid_candidates)
+        .cte("vector_ranked")
+    )
+    lexical_ranked = _lexical_ranked(
+        document_id, query, settings.hybrid_candidates
+    ).cte("lexical_ranked")
+
+    k = literal(float(settings.hybrid_rrf_k))
+    score = func.coalesce(1.0 / (k + vector_ranked.c.rank), 0.0) + func.coalesce(
+        1.0 / (k + lexical_ranked.c.rank), 0.0
+    )
+    fused = (
+        select(
+            func.coalesce(vector_ranked.c.id, lexical_ranked.c.id).label("id"),
+            score.label("score"),
+        )
+        .select_from(
+            vector_ranked.join(
+                lexical_ranked, vector_ranked.c.id == lexical_ranked.c.id, full=True
+            )
+        )
+        .subquery()
+    )
+    stmt = (
+        select(DocumentChunk)
+        .join(fused, DocumentChunk.id == fused.c.id)
+        .order_by(fused.c.score.desc())
+        .limit(top_k)
+    )
+
+    with telemetry.timed(
+        telemetry.RETRIEVAL_SECONDS, "retrieval.hybrid_search", step="hybrid_search"
+    ):
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+
 async def search_similar_chunks_multi_doc(
     db: AsyncSession,
     document_ids: list[uuid.UUID],
     query: str,
     top_k: int = 5,
+    exact: bool = False,
+    per_document_limit: int | None = None,
+    query_embedding: list[float] | None = None,
 ) -> list[DocumentChunk]:
     """
     Search for similar chunks across multiple documents.
+
+    By default candidates come from the HNSW index on `embedding_half` and
+    are re-ranked by exact cosine distance on the full-precision embedding.
+    Pass `exact=True` to force a full scan; it is also used when the index
+    returns fewer than `top_k` chunks, since the document filter is applied
+    after the graph scan. `per_document_limit` caps how many of the results
+    may come from any single document.
     """
-    query_embedding = generate_query_embedding(query)
+    if query_embedding is None:
+        query_embedding = await embed_query(query)
+    distance = DocumentChunk.embedding.cosine_distance(query_embedding)
 
-    stmt = (
-        select(DocumentChunk)
+    scored = select(
+        DocumentChunk.id,
+        distance.label("distance"),
+        func.row_number()
+        .over(partition_by=DocumentChunk.document_id, order_by=distance)
+        .label("document_rank"),
+    )
+
+    if exact:
+        scored = scored.where(DocumentChunk.document_id.in_(document_ids)).where(
+            DocumentChunk.embedding.isnot(None)
+        )
+    else:
+        candidates = await _ann_candidates(
+            db, document_ids, query_embedding, top_k * settings.ann_candidate_multiplier
+        )
+        scored = scored.join(candidates, DocumentChunk.id == candidates.c.id)
+
+    scored = scored.subquery()
+    stmt = select(DocumentChunk).join(scored, DocumentChunk.id == scored.c.id)
+    if per_document_limit is not None:
+        stmt = stmt.where(scored.c.document_rank <= per_document_limit)
+    stmt = stmt.order_by(scored.c.distance).limit(top_k)
+
+    with telemetry.timed(
+        telemetry.RETRIEVAL_SECONDS,
+        "retrieval.multi_doc_search",
+        step="multi_doc_search",
+    ):
+        result = await db.execute(stmt)
+        chunks = list(result.scalars().all())
+
+    if not exact and len(chunks) < top_k:
+        logger.debug(
+            "ANN search returned %d of %d chunks, falling back to exact search",
+            len(chunks),
+            top_k,
+        )
+        return await search_similar_chunks_multi_doc(
+            db,
+            document_ids,
+            query,
+            top_k=top_k,
+            exact=True,
+            per_document_limit=per_document_limit,
+            query_embedding=query_embedding,
+        )
+    return chunks
+
+
+async def _ann_candidates(
+    db: AsyncSession,
+    document_ids: list[uuid.UUID],
+    query_embedding: list[float],
+    candidate_count: int,
+):
+    """Subquery of approximate nearest chunk IDs from the HNSW index."""
+    # ef_search must cover the candidate pool or the index returns fewer rows
+    ef_search = max(settings.hnsw_ef_search, candidate_count)
+    await db.execute(
+        text("SELECT set_config('hnsw.ef_search', :value, true)"),
+        {"value": str(ef_search)},
+    )
+    if settings.hnsw_iterative_scan != "off":
+        # Keep scanning the graph when the document filter discards candidates
+        await db.execute(
+            text("SELECT set_config('hnsw.iterative_scan', :value, true)"),
+            {"value": settings.hnsw_iterative_scan},
+        )
+
+    return (
+        select(DocumentChunk.id)
         .where(DocumentChunk.document_id.in_(document_ids))
-        .where(DocumentChunk.embedding.isnot(None))
-        .order_by(DocumentChunk.embedding.cosine_distance(query_embedding))
-        .limit(top_k)
+        .where(DocumentChunk.embedding_half.isnot(None))
+        .order_by(DocumentChunk.embedding_half.cosine_distance(query_embedding))
+        .limit(candidate_count)
+        .subquery()
     )
 
-    result = await db.execute(stmt)
-    return list(result.scalars().all())
+
+def mmr_rerank(
+    chunks: list[DocumentChunk],
+    query_embedding: list[float],
+    lambda_mult: float | None = None,
+) -> list[DocumentChunk]:
+    """
+    Order chunks by maximal marginal relevance, using the embeddings already
+    loaded with them.
+
+    Each pick maximises `lambda_mult * sim(query, chunk) - (1 - lambda_mult)
+    * max sim(chunk, already picked)`, so near-duplicates such as
+    overlapping neighbours sink below chunks that add new content.
+    """
+    if len(chunks) < 2:
+        return list(chunks)
+    lambda_mult = settings.mmr_lambda if lambda_mult is None else lambda_mult
+
+    vectors = np.array([chunk.embedding for chunk in chunks], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1, norms)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query /= np.linalg.norm(query) or 1
+
+    relevance = vectors @ query
+    similarity = vectors @ vectors.T
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = similarity[selected[0]].copy()
+    while len(selected) < len(chunks):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        redundancy = np.maximum(redundancy, similarity[pick])
+
+    return [chunks[i] for i in selected]
@@ -0,0 +1,298 @@
+"""
+Prometheus metrics and OpenTelemetry tracing.
+
+Both are optional. Unless `metrics_enabled` / `tracing_enabled` is set and
+the client library is installed, the metrics below are no-ops and `span`
+yields without tracing, so instrumented code pays almost nothing.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Pipeline stages take seconds to minutes; the default buckets stop at 10s
+STAGE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+class _NoopMetric:
+    """Stands in for every metric while metrics are disabled."""
+
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def observe(self, amount: float) -> None:
+        pass
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+
+_NOOP = _NoopMetric()
+
+
+def _load_prometheus():
+    if not settings.metrics_enabled:
+        return None
+    if settings.prometheus_multiproc_dir:
+        # Read by prometheus_client at import time
+        os.environ.setdefault(
+            "PROMETHEUS_MULTIPROC_DIR", settings.prometheus_multiproc_dir
+        )
+    try:
+        import prometheus_client
+        import prometheus_client.multiprocess
+    except ImportError:
+        logger.warning("metrics_enabled is set but prometheus-client is not installed")
+        return None
+    return prometheus_client
+
+
+_prometheus = _load_prometheus()
+
+
+def _histogram(name: str, documentation: str, labels: list[str], buckets=None):
+    if _prometheus is None:
+        return _NOOP
+    kwargs = {"buckets": buckets} if buckets else {}
+    return _prometheus.Histogram(name, documentation, labels, **kwargs)
+
+
+def _counter(name: str, documentation: str, labels: list[str]):
+    if _prometheus is None:
+        return _NOOP
+    return _prometheus.Counter(name, documentation, labels)
+
+
+def _gauge(name: str, documentation: str, labels: list[str]):
+    if _prometheus is None:
+        return _NOOP
+    return _prometheus.Gauge(
+        name, documentation, labels, multiprocess_mode="mostrecent"
+    )
+
+
+PIPELINE_STAGE_SECONDS = _histogram(
+    "logos_pipeline_stage_seconds",
+    "Duration of document pipeline stages",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+RETRIEVAL_SECONDS = _histogram(
+    "logos_retrieval_seconds", "Duration of chat retrieval steps", ["step"]
+)
+EMBEDDING_REQUEST_SECONDS = _histogram(
+    "logos_embedding_request_seconds",
+    "Latency of embedding provider calls",
+    ["provider", "kind"],
+)
+DB_QUERY_SECONDS = _histogram(
+    "logos_db_query_seconds", "Database statement execution time", ["operation"]
+)
+LLM_FIRST_TOKEN_SECONDS = _histogram(
+    "logos_llm_first_token_seconds", "Time to the first streamed LLM token", []
+)
+LLM_REQUEST_SECONDS = _histogram(
+    "logos_llm_request_seconds",
+    "Duration of LLM calls",
+    ["mode"],
+    buckets=STAGE_BUCKETS,
+)
+LLM_TOKENS = _counter(
+    "logos_llm_tokens", "Estimated LLM tokens in chat prompts and answers", ["kind"]
+)
+EMBEDDING_TEXTS = _counter(
+    "logos_embedding_texts", "Texts sent to the embedding provider", ["provider"]
+)
+CHUNKS = _counter("logos_chunks", "Document chunks staged and embedded", ["event"])
+CACHE_REQUESTS = _counter(
+    "logos_cache_requests", "Cache lookups by cache and result", ["cache", "result"]
+)
+CELERY_QUEUE_DEPTH = _gauge(
+    "logos_celery_queue_depth", "Tasks waiting in a Celery queue", ["queue"]
+)
+
+
+def metrics_enabled() -> bool:
+    return _prometheus is not None
+
+
+def record_cache(cache: str, hit: bool, count: int = 1) -> None:
+    """Count `count` lookups of a cache as hits or misses."""
+    if count:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc(count)
+
+
+def _multiprocess() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def _registry():
+    if _multiprocess():
+        # Aggregate the values written by every process sharing the directory
+        registry = _prometheus.CollectorRegistry()
+        _prometheus.multiprocess.MultiProcessCollector(registry)
+        return registry
+    return _prometheus.REGISTRY
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type."""
+    return _prometheus.generate_latest(_registry()), _prometheus.CONTENT_TYPE_LATEST
+
+
+async def update_queue_depth(queues: list[str]) -> None:
+    """Refresh the queue depth gauge from the Redis broker."""
+    import redis
+
+    from app.core.redis_client import get_async_redis
+
+    try:
+        for queue in queues:
+            CELERY_QUEUE_DEPTH.labels(queue).set(await get_async_redis().llen(queue))
+    except redis.RedisError as e:
+        logger.warning("Celery queue depth read failed: %s", e)
+
+
+def start_worker_metrics_server() -> None:
+    """Serve the worker's metrics on `worker_metrics_port`."""
+    if _prometheus is None or not settings.worker_metrics_port:
+        return
+    if not _multiprocess():
+        logger.warning(
+            "Worker metrics need prometheus_multiproc_dir to include prefork "
+            "pool processes"
+        )
+    _prometheus.start_http_server(settings.worker_metrics_port, registry=_registry())
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop the live gauges of an exited worker process."""
+    if _prometheus is not None and _multiprocess():
+        _prometheus.multiprocess.mark_process_dead(pid)
+
+
+def instrument_engine(engine) -> None:
+    """Record statement durations of a sync engine (or an async engine's)."""
+    if _prometheus is None:
+        return
+    from sqlalchemy import event
+
+    engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._query_started_at = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        operation = statement.lstrip().split(None, 1)[0].upper()
+        DB_QUERY_SECONDS.labels(operation).observe(
+            time.perf_counter() - context._query_started_at
+        )
+
+
+# Tracing
+
+_tracer = None
+_tracer_pid: int | None = None
+
+
+def _get_tracer():
+    """
+    Get this process's tracer, or None when tracing is off. Created per
+    process, since the exporter's thread does not survive a fork into the
+    Celery pool.
+    """
+    global _tracer, _tracer_pid
+    if not settings.tracing_enabled:
+        return None
+    if _tracer_pid == os.getpid():
+        return _tracer
+
+    _tracer_pid = os.getpid()
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        logger.warning("tracing_enabled is set but opentelemetry is not installed")
+        _tracer = None
+        return None
+
+    # OTEL_SERVICE_NAME and OTEL_EXPORTER_OTLP_* override these defaults
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.app_name})
+    )
+    exporter = OTLPSpanExporter(endpoint=settings.otel_exporter_otlp_endpoint or None)
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    _tracer = provider.get_tracer("app")
+    return _tracer
+
+
+@contextmanager
+def span(name: str, parent: dict | None = None, **attributes) -> Iterator:
+    """
+    Trace the block as a span, child of the current span or of the remote
+    `parent` carrier from `trace_context()`. Yields the span, or None when
+    tracing is off.
+    """
+    tracer = _get_tracer()
+    if tracer is None:
+        yield None
+        return
+
+    from opentelemetry.propagate import extract
+
+    context = extract(parent) if parent else None
+    attributes = {key: value for key, value in attributes.items() if value is not None}
+    with tracer.start_as_current_span(
+        name, context=context, attributes=attributes
+    ) as current:
+        yield current
+
+
+def trace_context() -> dict | None:
+    """Carrier of the current span, for passing to a Celery task."""
+    if _get_tracer() is None:
+        return None
+    from opentelemetry.propagate import inject
+
+    carrier: dict = {}
+    inject(carrier)
+    return carrier or None
+
+
+@contextmanager
+def timed(metric, span_name: str | None = None, **labels) -> Iterator:
+    """
+    Observe the block's duration on a histogram with the given labels,
+    traced as `span_name` if set.
+    """
+    if metric is _NOOP and span_name is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        if span_name is None:
+            yield
+        else:
+            with span(span_name, **labels):
+                yield
+    finally:
+        (metric.labels(**labels) if labels else metric).observe(
+            time.perf_counter() - started
+        )
@@ -0,0 +1,215 @@
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from app.config import get_settings
+from app.core import telemetry
+
+settings = get_settings()
+
+_DTYPES = {"float16": np.float16, "float32": np.float32}
+
+# float16 rows are upcast this many at a time for scoring
+SEARCH_BLOCK_ROWS = 256
+
+# Documents remembered as too large to cache, so they are not loaded again
+MAX_OVERSIZED = 1024
+
+_scratch = threading.local()
+
+
+def _scratch_block(dimensions: int) -> np.ndarray:
+    """This thread's reusable float32 buffer for upcasting float16 rows."""
+    block = getattr(_scratch, "block", None)
+    if block is None or block.shape[1] != dimensions:
+        block = _scratch.block = np.empty(
+            (SEARCH_BLOCK_ROWS, dimensions), dtype=np.float32
+        )
+    return block
+
+
+class CachedDocument:
+    """A document's embedded chunks with pre-normalized vectors as one matrix."""
+
+    def __init__(
+        self,
+        updated_at: datetime,
+        chunk_ids: list[uuid.UUID],
+        chunk_indexes: list[int],
+        contents: list[str],
+        chunk_metadata: list[dict],
+        matrix: np.ndarray,
+    ):
+        self.updated_at = updated_at
+        self.chunk_ids = chunk_ids
+        self.chunk_indexes = chunk_indexes
+        self.contents = contents
+        self.chunk_metadata = chunk_metadata  # offsets, for merging neighbours
+        self.matrix = matrix  # (chunks, dimensions), unit-length rows
+        self.nbytes = matrix.nbytes + sum(len(content) for content in contents)
+
+    def search(
+        self, query_embedding: list[float], top_k: int
+    ) -> list[tuple[int, float]]:
+        """Return (row, cosine similarity) of the top_k rows, best first."""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1
+        scores = self._scores(query)
+
+        k = min(top_k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        if self.matrix.dtype == np.float32:
+            return self.matrix @ query
+        # float16 has no BLAS path, so rows are upcast a block at a time into
+        # a reused buffer rather than copying the whole matrix per search
+        scores = np.empty(len(self.matrix), dtype=np.float32)
+        block = _scratch_block(self.matrix.shape[1])
+        for start in range(0, len(self.matrix), SEARCH_BLOCK_ROWS):
+            rows = self.matrix[start : start + SEARCH_BLOCK_ROWS]
+            upcast = block[: len(rows)]
+            np.copyto(upcast, rows)
+            np.matmul(upcast, query, out=scores[start : start + len(rows)])
+        return scores
+
+
+class DocumentVectorCache:
+    """
+    In-process cache of hot documents' chunk embeddings.
+
+    Entries are evicted least recently used first once their total size
+    exceeds `max_bytes`. An entry is only served while the document's
+    `updated_at` matches the value it was loaded with, so reprocessing a
+    document invalidates it on every replica. Documents found too large to
+    cache are remembered the same way, so they are not loaded again.
+    """
+
+    def __init__(self, max_bytes: int, dtype: str = "float32"):
+        if dtype not in _DTYPES:
+            raise ValueError(f"Unsupported cache dtype: {dtype}")
+
+        self.max_bytes = max_bytes
+        self.dtype = _DTYPES[dtype]
+        self.total_bytes = 0
+
+        self._entries: OrderedDict[uuid.UUID, CachedDocument] = OrderedDict()
+        self._oversized: OrderedDict[uuid.UUID, datetime] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def max_chunks(self, dimensions: int) -> int:
+        """Most chunks of a document whose vectors alone fit in the cache."""
+        return self.max_bytes // (dimensions * np.dtype(self.dtype).itemsize)
+
+    def get(
+        self, document_id: uuid.UUID, updated_at: datetime, record: bool = True
+    ) -> CachedDocument | None:
+        """
+        Look up a document, dropping it if it has changed since loading.
+        With `record=False` the lookup is not counted as a hit or miss.
+        """
+        with self._lock:
+            entry = self._entries.get(document_id)
+            if entry is not None and entry.updated_at != updated_at:
+                self._remove(document_id)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(document_id)
+            if record:
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                telemetry.record_cache("vector", entry is not None)
+            return entry
+
+    def is_oversized(self, document_id: uuid.UUID, updated_at: datetime) -> bool:
+        """Whether this version of a document was found too large to cache."""
+        with self._lock:
+            return self._oversized.get(document_id) == updated_at
+
+    def mark_oversized(self, document_id: uuid.UUID, updated_at: datetime) -> None:
+        """Remember that this version of a document is too large to cache."""
+        with self._lock:
+            self._oversized[document_id] = updated_at
+            self._oversized.move_to_end(document_id)
+            while len(self._oversized) > MAX_OVERSIZED:
+                self._oversized.popitem(last=False)
+
+    def put(
+        self,
+        document_id: uuid.UUID,
+        updated_at: datetime,
+        chunk_ids: list[uuid.UUID],
+        chunk_indexes: list[int],
+        contents: list[str],
+        chunk_metadata: list[dict],
+        embeddings: list,
+    ) -> CachedDocument | None:
+        """Cache a document's chunks; returns None if it can never fit."""
+        matrix = np.array(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        matrix = np.ascontiguousarray(matrix, dtype=self.dtype)
+
+        entry = CachedDocument(
+            updated_at, chunk_ids, chunk_indexes, contents, chunk_metadata, matrix
+        )
+        if entry.nbytes > self.max_bytes:
+            self.mark_oversized(document_id, updated_at)
+            return None
+
+        with self._lock:
+            self._remove(document_id)
+            self._entries[document_id] = entry
+            self.total_bytes += entry.nbytes
+            while self.total_bytes > self.max_bytes:
+                evicted_id = next(iter(self._entries))
+                self._remove(evicted_id)
+        return entry
+
+    def invalidate(self, document_id: uuid.UUID) -> None:
+        """Drop a document, e.g. after it is deleted."""
+        with self._lock:
+            self._remove(document_id)
+            self._oversized.pop(document_id, None)
+
+    def _remove(self, document_id: uuid.UUID) -> None:
+        entry = self._entries.pop(document_id, None)
+        if entry is not None:
+            self.total_bytes -= entry.nbytes
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and memory use."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "documents": len(self._entries),
+            "bytes": self.total_bytes,
+        }
+
+
+_vector_cache: DocumentVectorCache | None = None
+
+
+def get_document_vector_cache() -> DocumentVectorCache:
+    """Get or create the process-wide document vector cache."""
+    global _vector_cache
+    if _vector_cache is None:
+        _vector_cache = DocumentVectorCache(
+            max_bytes=settings.vector_cache_max_mb * 1024 * 1024,
+            dtype=settings.vector_cache_dtype,
+        )
+    return _vector_cache
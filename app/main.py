@@ -1,13 +1,17 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import get_settings
 from app.api.routes import documents, chat
+from app.core import telemetry
 from app.models.database import engine, Base
+from app.workers.celery_app import celery_app
 
 settings = get_settings()
 
+telemetry.instrument_engine(engine)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -34,8 +38,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+if settings.tracing_enabled:
+
+    @app.middleware("http")
+    async def trace_requests(request: Request, call_next):
+        """Trace each request, continuing the caller's trace if it sent one."""
+        with telemetry.span(
+            f"{request.method} {request.url.path}",
+            parent=dict(request.headers),
+            **{"http.method": request.method, "http.target": request.url.path},
+        ) as current:
+            response = await call_next(request)
+            route = request.scope.get("route")
+            if current is not None:
+                if route is not None:
+                    current.update_name(f"{request.method} {route.path}")
+                current.set_attribute("http.status_code", response.status_code)
+            return response
+
+
 # Include routers
 app.include_router(documents.router)
 app.include_router(chat.router)
@@ -45,3 +69,16 @@ app.include_router(chat.router)
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics of the API processes."""
+    if not telemetry.metrics_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Metrics are disabled",
+        )
+    await telemetry.update_queue_depth([celery_app.conf.task_default_queue])
+    body, content_type = telemetry.render_metrics()
+    return Response(body, media_type=content_type)
@@ -1,10 +1,16 @@
-from app.models.database import Base, get_db, engine, Document, DocumentChunk, DocumentStatus
+from app.models.database import Base, get_db, engine, Document, DocumentChunk, DocumentStatus, ChunkEmbedding
 from app.models.schemas import (
     DocumentCreate,
     DocumentResponse,
+    DocumentListItem,
     DocumentUploadResponse,
+    BatchUploadResponse,
+    BatchStatusResponse,
+    DocumentPurgeRequest,
+    DocumentPurgeResponse,
     ProcessingStatusResponse,
     ChatRequest,
+    MultiDocumentChatRequest,
     ChatMessage,
 )
 
@@ -15,10 +21,17 @@ __all__ = [
     "Document",
     "DocumentChunk",
     "DocumentStatus",
+    "ChunkEmbedding",
     "DocumentCreate",
     "DocumentResponse",
+    "DocumentListItem",
     "DocumentUploadResponse",
+    "BatchUploadResponse",
+    "BatchStatusResponse",
+    "DocumentPurgeRequest",
+    "DocumentPurgeResponse",
     "ProcessingStatusResponse",
     "ChatRequest",
+    "MultiDocumentChatRequest",
     "ChatMessage",
 ]
\ No newline at end of file
@@ -1,16 +1,40 @@
+import csv
+import io
+import json
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, Text, Integer, DateTime, ForeignKey, Enum as SQLEnum
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy import (
+    Computed,
+    insert,
+    text,
+    update,
+    String,
+    Text,
+    Integer,
+    DateTime,
+    ForeignKey,
+    Index,
+    Enum as SQLEnum,
+)
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    Session,
+    mapped_column,
+    relationship,
+)
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR, insert as pg_insert
+from pgvector.sqlalchemy import Vector, HALFVEC
 import enum
 
 from app.config import get_settings
 
 settings = get_settings()
 
+# Vector column size, set by the configured embedding provider
+EMBEDDING_DIMENSION = settings.embedding_dimension
+
 
 class Base(DeclarativeBase):
     pass
@@ -25,6 +49,17 @@ class DocumentStatus(enum.Enum):
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Keyset pagination over (created_at, id), optionally filtered
+        Index("ix_documents_created_at_id", "created_at", "id"),
+        Index("ix_documents_status_created_at_id", "status", "created_at", "id"),
+        Index(
+            "ix_documents_classification_created_at_id",
+            "classification",
+            "created_at",
+            "id",
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -37,6 +72,12 @@ class Document(Base):
     summary: Mapped[str | None] = mapped_column(Text, nullable=True)
     classification: Mapped[str | None] = mapped_column(String(100), nullable=True)
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(
+        String(64), nullable=True, index=True
+    )  # SHA-256 of the uploaded bytes
+    batch_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True, index=True
+    )  # Set for documents uploaded together through /documents/batch
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
@@ -46,14 +87,45 @@ class Document(Base):
         onupdate=lambda: datetime.now(timezone.utc),
     )
 
-    # Relationship to chunks
+    # Relationship to chunks; deletes rely on the ON DELETE CASCADE foreign key
+    # rather than loading every chunk (and its embedding) into the session
     chunks: Mapped[list["DocumentChunk"]] = relationship(
-        "DocumentChunk", back_populates="document", cascade="all, delete-orphan"
+        "DocumentChunk",
+        back_populates="document",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
 
 class DocumentChunk(Base):
     __tablename__ = "document_chunks"
+    __table_args__ = (
+        Index(
+            "ix_document_chunks_document_id_chunk_index", "document_id", "chunk_index"
+        ),
+        # Per-document vector search only considers embedded chunks
+        Index(
+            "ix_document_chunks_document_id_embedded",
+            "document_id",
+            postgresql_where=text("embedding IS NOT NULL"),
+        ),
+        # pgvector can't index `vector` above 2000 dimensions (Gemini's have
+        # 3072), but HNSW supports halfvec up to 4000 dimensions. The index
+        # serves the approximate candidate scan; exact ranking still uses
+        # `embedding`.
+        Index(
+            "ix_document_chunks_embedding_half_hnsw",
+            "embedding_half",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding_half": "halfvec_cosine_ops"},
+        ),
+        Index(
+            "ix_document_chunks_content_tsv",
+            "content_tsv",
+            postgresql_using="gin",
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -66,14 +138,37 @@ class DocumentChunk(Base):
     content: Mapped[str] = mapped_column(Text, nullable=False)
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
     embedding: Mapped[list[float]] = mapped_column(
-        Vector(3072), nullable=True
-    )  # Gemini embedding dimension
+        Vector(EMBEDDING_DIMENSION), nullable=True
+    )
+    embedding_half: Mapped[list[float] | None] = mapped_column(
+        HALFVEC(EMBEDDING_DIMENSION), nullable=True
+    )  # Half-precision copy of `embedding`, indexed with HNSW
     chunk_metadata: Mapped[dict] = mapped_column(JSONB, default=dict)
+    content_tsv: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('english', content)", persisted=True),
+        deferred=True,
+    )  # Full-text search vector, maintained by PostgreSQL
 
     # Relationship to document
     document: Mapped["Document"] = relationship("Document", back_populates="chunks")
 
 
+class ChunkEmbedding(Base):
+    """Embeddings keyed by chunk text hash, shared across documents."""
+
+    __tablename__ = "chunk_embeddings"
+
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    embedding_model: Mapped[str] = mapped_column(String(100), primary_key=True)
+    embedding: Mapped[list[float]] = mapped_column(
+        Vector(EMBEDDING_DIMENSION), nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+
 # Async engine and session
 engine = create_async_engine(settings.database_url, echo=settings.debug)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -90,3 +185,153 @@ async def get_db():
             raise
         finally:
             await session.close()
+
+
+# Bulk chunk writes (sync sessions, used by the worker)
+#
+# "copy" streams rows through PostgreSQL COPY on the session's connection;
+# "executemany" sends one multi-row statement per call. Neither builds ORM
+# objects, and both run inside the session's transaction.
+
+
+def _copy_rows(db: Session, sql: str, rows: list[list]) -> None:
+    """COPY CSV rows into the database on the session's connection."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    dbapi_connection = db.connection().connection
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
+
+
+def _vector_literal(embedding: list[float]) -> str:
+    return "[" + ",".join(str(float(v)) for v in embedding) + "]"
+
+
+def bulk_insert_chunks(db: Session, rows: list[dict]) -> None:
+    """
+    Insert chunk rows (document_id, content, chunk_index, chunk_metadata)
+    without embeddings. Does not commit.
+    """
+    if not rows:
+        return
+
+    if settings.chunk_write_method == "copy":
+        _copy_rows(
+            db,
+            # An unquoted empty CSV field reads as NULL; content is never NULL
+            "COPY document_chunks (id, document_id, content, chunk_index, "
+            "chunk_metadata) FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (content))",
+            [
+                [
+                    uuid.uuid4(),
+                    row["document_id"],
+                    row["content"],
+                    row["chunk_index"],
+                    json.dumps(row.get("chunk_metadata", {})),
+                ]
+                for row in rows
+            ],
+        )
+    else:
+        db.execute(insert(DocumentChunk), rows)
+
+
+def bulk_update_embeddings(
+    db: Session, chunk_ids: list[uuid.UUID], embeddings: list[list[float]]
+) -> None:
+    """Set `embedding` and `embedding_half` for the given chunks. Does not commit."""
+    if not chunk_ids:
+        return
+
+    if settings.chunk_write_method == "copy":
+        # Stage vectors in a transaction-scoped temp table, then one UPDATE
+        db.execute(
+            text(
+                "CREATE TEMP TABLE IF NOT EXISTS chunk_embedding_staging "
+                f"(id uuid PRIMARY KEY, embedding vector({EMBEDDING_DIMENSION})) "
+                "ON COMMIT DELETE ROWS"
+            )
+        )
+        _copy_rows(
+            db,
+            "COPY chunk_embedding_staging (id, embedding) FROM STDIN WITH (FORMAT csv)",
+            [
+                [chunk_id, _vector_literal(embedding)]
+                for chunk_id, embedding in zip(chunk_ids, embeddings)
+            ],
+        )
+        db.execute(
+            text(
+                "UPDATE document_chunks AS c "
+                "SET embedding = s.embedding, "
+                f"embedding_half = s.embedding::halfvec({EMBEDDING_DIMENSION}) "
+                "FROM chunk_embedding_staging AS s WHERE c.id = s.id"
+            )
+        )
+    else:
+        db.execute(
+            update(DocumentChunk),
+            [
+                {"id": chunk_id, "embedding": embedding, "embedding_half": embedding}
+                for chunk_id, embedding in zip(chunk_ids, embeddings)
+            ],
+        )
+
+
+def get_chunk_embeddings(
+    db: Session, content_hashes: list[str]
+) -> dict[str, list[float]]:
+    """Look up stored embeddings for chunk text hashes under the current model."""
+    if not content_hashes:
+        return {}
+
+    rows = db.query(ChunkEmbedding.content_hash, ChunkEmbedding.embedding).filter(
+        ChunkEmbedding.embedding_model == settings.embedding_model,
+        ChunkEmbedding.content_hash.in_(set(content_hashes)),
+    )
+    return {row.content_hash: row.embedding for row in rows}
+
+
+def store_chunk_embeddings(
+    db: Session, content_hashes: list[str], embeddings: list[list[float]]
+) -> None:
+    """Record embeddings by chunk text hash, skipping known ones. Does not commit."""
+    if not content_hashes:
+        return
+
+    db.execute(
+        pg_insert(ChunkEmbedding).on_conflict_do_nothing(),
+        [
+            {
+                "content_hash": content_hash,
+                "embedding_model": settings.embedding_model,
+                "embedding": embedding,
+            }
+            for content_hash, embedding in zip(content_hashes, embeddings)
+        ],
+    )
+
+
+def clone_document_chunks(
+    db: Session, source_id: uuid.UUID, target_id: uuid.UUID
+) -> int:
+    """
+    Replace the target document's chunks with a server-side copy of the
+    source document's chunks, embeddings included. Does not commit.
+    """
+    db.execute(
+        text("DELETE FROM document_chunks WHERE document_id = :target_id"),
+        {"target_id": target_id},
+    )
+    result = db.execute(
+        text(
+            "INSERT INTO document_chunks (id, document_id, content, chunk_index, "
+            "embedding, embedding_half, chunk_metadata) "
+            "SELECT gen_random_uuid(), :target_id, content, chunk_index, "
+            "embedding, embedding_half, chunk_metadata "
+            "FROM document_chunks WHERE document_id = :source_id"
+        ),
+        {"source_id": source_id, "target_id": target_id},
+    )
+    return result.rowcount
@@ -1,5 +1,6 @@
 import uuid
 from datetime import datetime
+from typing import Literal
 from pydantic import BaseModel, Field
 from enum import Enum
 from app.models.database import DocumentStatus
@@ -13,6 +14,13 @@ class ChatRequest(BaseModel):
     document_id: uuid.UUID
     message: str
     conversation_history: list["ChatMessage"] = Field(default_factory=list)
+    retrieval_mode: Literal["vector", "hybrid"] = "vector"
+
+
+class MultiDocumentChatRequest(BaseModel):
+    document_ids: list[uuid.UUID] = Field(min_length=1, max_length=100)
+    message: str
+    conversation_history: list["ChatMessage"] = Field(default_factory=list)
 
 
 class ChatMessage(BaseModel):
@@ -36,11 +44,50 @@ class DocumentResponse(BaseModel):
         from_attributes = True
 
 
+class DocumentListItem(BaseModel):
+    """A document row restricted to the fields requested when listing."""
+
+    id: uuid.UUID
+    filename: str | None = None
+    content_type: str | None = None
+    status: DocumentStatus | None = None
+    summary: str | None = None
+    classification: str | None = None
+    error_message: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+
 class DocumentUploadResponse(BaseModel):
     id: uuid.UUID
     message: str
 
 
+class BatchUploadResponse(BaseModel):
+    batch_id: uuid.UUID
+    document_ids: list[uuid.UUID]
+    message: str
+
+
+class BatchStatusResponse(BaseModel):
+    batch_id: uuid.UUID
+    total: int
+    pending: int
+    processing: int
+    completed: int
+    failed: int
+    percent: float
+
+
+class DocumentPurgeRequest(BaseModel):
+    document_ids: list[uuid.UUID] = Field(min_length=1, max_length=1000)
+
+
+class DocumentPurgeResponse(BaseModel):
+    deleted: list[uuid.UUID]
+    not_found: list[uuid.UUID]
+
+
 class ProcessingStatusResponse(BaseModel):
     id: uuid.UUID
     status: DocumentStatus
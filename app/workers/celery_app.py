@@ -1,5 +1,7 @@
 from celery import Celery
+from celery.signals import worker_process_shutdown, worker_ready
 from app.config import get_settings
+from app.core import telemetry
 
 settings = get_settings()
 
@@ -20,3 +22,14 @@ celery_app.conf.update(
     task_acks_late=True,
     worker_prefetch_multiplier=1,
 )
+
+
+@worker_ready.connect
+def start_metrics_server(**kwargs):
+    """Expose metrics of the whole worker, pool processes included."""
+    telemetry.start_worker_metrics_server()
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    telemetry.mark_process_dead(pid)
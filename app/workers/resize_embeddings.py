@@ -0,0 +1,136 @@
+"""
+Resize the embedding columns to `embedding_dimension`.
+
+Run after switching `embedding_model` to a provider with a different vector
+size, once the new settings are deployed to the workers:
+
+    python -m app.workers.resize_embeddings
+
+Vectors of the old size cannot be converted, so they are cleared along with
+the shared chunk embeddings. Documents that had embedded chunks are set back
+to pending and queued for processing, which re-embeds their existing chunks.
+With an unchanged dimension nothing is done.
+"""
+
+import argparse
+import logging
+import os
+import uuid
+
+from sqlalchemy import select, text, update
+
+from app.config import get_settings
+from app.models.database import Document, DocumentChunk, DocumentStatus
+from app.workers.tasks import SyncSession, _mark_failed, process_document
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def current_dimension(db) -> int:
+    """Dimension of the document_chunks.embedding column."""
+    return db.execute(
+        text(
+            "SELECT atttypmod FROM pg_attribute "
+            "WHERE attrelid = 'document_chunks'::regclass "
+            "AND attname = 'embedding'"
+        )
+    ).scalar()
+
+
+def resize_embedding_columns(db, dimension: int) -> list[uuid.UUID]:
+    """
+    Resize the vector columns to `dimension`, clearing their vectors, and set
+    documents that had embeddings back to pending. Returns their IDs.
+    """
+    dimension = int(dimension)
+    embedded = (
+        select(DocumentChunk.document_id)
+        .where(DocumentChunk.embedding.isnot(None))
+        .distinct()
+    )
+    document_ids = (
+        db.execute(
+            update(Document)
+            .where(Document.id.in_(embedded))
+            .values(
+                status=DocumentStatus.PENDING,
+                error_message="Embedding dimension changed; re-embedding",
+            )
+            .returning(Document.id)
+        )
+        .scalars()
+        .all()
+    )
+
+    db.execute(text("DROP INDEX IF EXISTS ix_document_chunks_embedding_half_hnsw"))
+    db.execute(
+        text(
+            "ALTER TABLE document_chunks "
+            f"ALTER COLUMN embedding TYPE vector({dimension}) USING NULL, "
+            f"ALTER COLUMN embedding_half TYPE halfvec({dimension}) USING NULL"
+        )
+    )
+    # Shared embeddings of the old size can't be reused
+    db.execute(text("TRUNCATE chunk_embeddings"))
+    db.execute(
+        text(
+            "ALTER TABLE chunk_embeddings "
+            f"ALTER COLUMN embedding TYPE vector({dimension})"
+        )
+    )
+    # Every vector is NULL now, so the index builds instantly
+    db.execute(
+        text(
+            "CREATE INDEX ix_document_chunks_embedding_half_hnsw "
+            "ON document_chunks USING hnsw (embedding_half halfvec_cosine_ops) "
+            "WITH (m = 16, ef_construction = 64)"
+        )
+    )
+    return document_ids
+
+
+def _upload_path(document_id: uuid.UUID) -> str | None:
+    for ext in [".pdf", ".txt"]:
+        file_path = os.path.join(settings.upload_dir, f"{document_id}{ext}")
+        if os.path.exists(file_path):
+            return file_path
+    return None
+
+
+def run(dimension: int) -> list[uuid.UUID]:
+    """Resize the columns and queue affected documents for re-embedding."""
+    with SyncSession() as db:
+        previous = current_dimension(db)
+        if previous == dimension:
+            logger.info("Embedding columns already have dimension %d", dimension)
+            return []
+        document_ids = resize_embedding_columns(db, dimension)
+        db.commit()
+    logger.info(
+        "Resized embedding columns from %d to %d; re-embedding %d documents",
+        previous,
+        dimension,
+        len(document_ids),
+    )
+
+    for document_id in document_ids:
+        file_path = _upload_path(document_id)
+        if file_path is None:
+            _mark_failed(str(document_id), "Upload missing; cannot re-embed")
+            continue
+        process_document.delay(str(document_id), file_path)
+    return document_ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dimension", type=int, default=settings.embedding_dimension)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run(args.dimension)
+
+
+if __name__ == "__main__":
+    main()
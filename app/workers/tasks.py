@@ -1,14 +1,28 @@
+import time
 import uuid
-from sqlalchemy import create_engine
+from celery import chord
+from sqlalchemy import and_, create_engine, func, or_
 from sqlalchemy.orm import sessionmaker
 
 from app.workers.celery_app import celery_app
 from app.config import get_settings
-from app.models.database import Document, DocumentChunk, DocumentStatus
-from app.core.parsing import parse_document
-from app.core.chunking import chunk_text
-from app.core.embeddings import generate_embeddings
+from app.models.database import (
+    Document,
+    DocumentChunk,
+    DocumentStatus,
+    bulk_insert_chunks,
+    bulk_update_embeddings,
+    clone_document_chunks,
+    get_chunk_embeddings,
+    store_chunk_embeddings,
+)
+from app.core.parsing import iter_document_pages
+from app.core.chunking import chunk_hash, iter_chunks
+from app.core.embeddings import generate_embeddings_batched, is_rate_limit_error
 from app.core.llm import generate_response
+from app.core.response_cache import invalidate_document_sync
+from app.core.progress import publish_progress, record_embedded, start_embedding
+from app.core import telemetry
 from app.core.prompts import (
     build_summary_prompt,
     build_classification_prompt,
@@ -18,21 +32,53 @@ from app.core.prompts import (
 
 settings = get_settings()
 
-sync_engine = create_engine(settings.database_url_sync)
+# values_plus_batch lets psycopg2 batch executemany UPDATEs as well as INSERTs
+sync_engine = create_engine(
+    settings.database_url_sync, executemany_mode="values_plus_batch"
+)
 SyncSession = sessionmaker(bind=sync_engine)
+telemetry.instrument_engine(sync_engine)
 
 
-@celery_app.task(bind=True, name="process_document")
-def process_document(self, document_id: str, file_path: str):
+def _mark_failed(document_id: str, error: str) -> None:
+    """Mark a document as failed with the given error message."""
+    with SyncSession() as db:
+        document = (
+            db.query(Document).filter(Document.id == uuid.UUID(document_id)).first()
+        )
+        if document:
+            document.status = DocumentStatus.FAILED
+            document.error_message = error
+            db.commit()
+    publish_progress(document_id, "failed", status="failed", error=error)
+
+
+def _find_processed_duplicate(db, document: Document) -> Document | None:
+    """Find another completed document with the same content hash."""
+    if not document.content_hash:
+        return None
+    return (
+        db.query(Document)
+        .filter(Document.content_hash == document.content_hash)
+        .filter(Document.id != document.id)
+        .filter(Document.status == DocumentStatus.COMPLETED)
+        .order_by(Document.created_at)
+        .first()
+    )
+
+
+def _stage_document(task, document_id: str, file_path: str) -> dict:
     """
-    Main task to process a document through the pipeline:
-    1. Parse document
-    2. Chunk text
-    3. Generate embeddings
-    4. Generate summary
-    5. Classify document
+    Parse and chunk a document as a stream, staging chunk rows without
+    embeddings in bounded batches. Only one batch of chunks is held in
+    memory; a retry resumes after the last staged chunk.
+
+    Returns the staging result; `status` is "completed" when the document
+    was deduplicated instead. Marks the document failed and re-raises on
+    error.
     """
     doc_uuid = uuid.UUID(document_id)
+    started = time.perf_counter()
 
     with SyncSession() as db:
         try:
@@ -44,69 +90,633 @@ def process_document(self, document_id: str, file_path: str):
             # Update status to processing
             document.status = DocumentStatus.PROCESSING
             db.commit()
+            # Answers cached against a previous run may no longer hold
+            invalidate_document_sync(document_id)
+            publish_progress(document_id, "parsing")
 
-            # Step 1: Parse document
-            self.update_state(state="PROGRESS", meta={"step": "parsing"})
-            text = parse_document(file_path)
+            # Identical bytes were already processed: reuse that result
+            duplicate_of = _find_processed_duplicate(db, document)
+            if duplicate_of is not None:
+                chunks_copied = clone_document_chunks(db, duplicate_of.id, doc_uuid)
+                document.summary = duplicate_of.summary
+                document.classification = duplicate_of.classification
+                document.status = DocumentStatus.COMPLETED
+                db.commit()
+                publish_progress(
+                    document_id,
+                    "completed",
+                    status="completed",
+                    deduplicated_from=str(duplicate_of.id),
+                )
+                return {
+                    "document_id": document_id,
+                    "status": "completed",
+                    "deduplicated_from": str(duplicate_of.id),
+                    "chunks_created": chunks_copied,
+                }
 
-            if not text.strip():
-                raise ValueError("Document is empty or could not be parsed")
+            task.update_state(state="PROGRESS", meta={"step": "parsing"})
+            page_stats: list[dict] = []
+            leading_text = ""
+
+            def tracked_pages():
+                nonlocal leading_text
+                previous_page = None
+                for page in iter_document_pages(file_path):
+                    page_stats.append(
+                        {
+                            "page_number": page["page_number"],
+                            "seconds": page["seconds"],
+                            "error": page["error"],
+                        }
+                    )
+                    if page["text"]:
+                        # Keep the leading text for summary and classification
+                        if len(leading_text) < 10000:
+                            if leading_text and page["page_number"] != previous_page:
+                                leading_text += "\n\n"
+                            leading_text += page["text"][:10000]
+                        previous_page = page["page_number"]
+                    yield page
 
-            # Step 2: Chunk text
-            self.update_state(state="PROGRESS", meta={"step": "chunking"})
-            chunks = chunk_text(text)
-
-            # Step 3: Generate embeddings
-            self.update_state(state="PROGRESS", meta={"step": "embedding"})
-            chunk_texts = [c["content"] for c in chunks]
-            embeddings = generate_embeddings(chunk_texts)
-
-            # Store chunks with embeddings
-            for chunk_data, embedding in zip(chunks, embeddings):
-                chunk = DocumentChunk(
-                    document_id=doc_uuid,
-                    content=chunk_data["content"],
-                    chunk_index=chunk_data["chunk_index"],
-                    embedding=embedding,
-                    chunk_metadata={"char_count": chunk_data["char_count"]},
+            staged_count = (
+                db.query(func.coalesce(func.max(DocumentChunk.chunk_index) + 1, 0))
+                .filter(DocumentChunk.document_id == doc_uuid)
+                .scalar()
+            )
+            batch_size = settings.chunk_insert_batch_size
+            chunk_count = 0
+            rows = []
+
+            for chunk_data in iter_chunks(tracked_pages()):
+                chunk_count += 1
+                if chunk_data["chunk_index"] < staged_count:
+                    continue
+                rows.append(
+                    {
+                        "document_id": doc_uuid,
+                        "content": chunk_data["content"],
+                        "chunk_index": chunk_data["chunk_index"],
+                        "chunk_metadata": {
+                            "char_count": chunk_data["char_count"],
+                            "char_start": chunk_data["char_start"],
+                            "char_end": chunk_data["char_end"],
+                            "page_start": chunk_data["page_start"],
+                            "page_end": chunk_data["page_end"],
+                            **(
+                                {"token_count": chunk_data["token_count"]}
+                                if "token_count" in chunk_data
+                                else {}
+                            ),
+                        },
+                    }
                 )
-                db.add(chunk)
+                if len(rows) >= batch_size:
+                    bulk_insert_chunks(db, rows)
+                    db.commit()
+                    telemetry.CHUNKS.labels("staged").inc(len(rows))
+                    rows = []
+                    publish_progress(document_id, "parsing", chunks_staged=chunk_count)
+
+            if rows:
+                bulk_insert_chunks(db, rows)
+                db.commit()
+                telemetry.CHUNKS.labels("staged").inc(len(rows))
+
+            if chunk_count == 0:
+                raise ValueError("Document is empty or could not be parsed")
+
+            pending_indexes = [
+                row.chunk_index
+                for row in db.query(DocumentChunk.chunk_index)
+                .filter(DocumentChunk.document_id == doc_uuid)
+                .filter(DocumentChunk.embedding.is_(None))
+                .order_by(DocumentChunk.chunk_index)
+            ]
+
+        except Exception as e:
+            db.rollback()
+            _mark_failed(document_id, str(e))
+            raise
+
+    # Parsing is interleaved with chunking and staging; pages time themselves
+    parse_seconds = sum(page["seconds"] for page in page_stats)
+    telemetry.PIPELINE_STAGE_SECONDS.labels("parse").observe(parse_seconds)
+    telemetry.PIPELINE_STAGE_SECONDS.labels("stage").observe(
+        time.perf_counter() - started
+    )
+    return {
+        "document_id": document_id,
+        "status": "staged",
+        "chunks_created": chunk_count,
+        "pending_indexes": pending_indexes,
+        "leading_text": leading_text[:10000],
+        "pages": len({page["page_number"] for page in page_stats}),
+        "parse_seconds": round(parse_seconds, 3),
+        "slowest_pages": [
+            {"page_number": page["page_number"], "seconds": round(page["seconds"], 3)}
+            for page in sorted(page_stats, key=lambda p: p["seconds"], reverse=True)[:5]
+        ],
+        "failed_pages": [page["page_number"] for page in page_stats if page["error"]],
+    }
+
+
+@celery_app.task(bind=True, name="process_document")
+def process_document(
+    self, document_id: str, file_path: str, trace_context: dict | None = None
+):
+    """
+    Entry point of the document pipeline. Parses, chunks and stages chunk
+    rows, then dispatches the remaining stages as a chord:
+
+        embed_chunks (one per chunk range) ─┐
+        summarize_document                  ├─> finalize_document
+        classify_document                   ┘
+
+    Every stage is idempotent, so re-running the pipeline only redoes work
+    that has not been persisted yet. `trace_context` links the stages' spans
+    to the upload request.
+    """
+    started_at = time.time()
+    with telemetry.span(
+        "process_document", parent=trace_context, document_id=document_id
+    ):
+        staged = _stage_document(self, document_id, file_path)
+        # Stage tasks continue this trace
+        trace_context = telemetry.trace_context()
+    if staged["status"] == "completed":
+        return staged
+
+    # Fan out embedding over chunk ranges that still lack vectors
+    pending_indexes = staged.pop("pending_indexes")
+    leading_text = staged.pop("leading_text")
+    per_task = settings.embedding_chunks_per_task
+    embed_tasks = [
+        embed_chunks.s(
+            document_id,
+            pending_indexes[i],
+            pending_indexes[min(i + per_task, len(pending_indexes)) - 1],
+            trace_context=trace_context,
+        )
+        for i in range(0, len(pending_indexes), per_task)
+    ]
+
+    self.update_state(state="PROGRESS", meta={"step": "dispatching"})
+    start_embedding(document_id, len(pending_indexes))
+    # Summary and classification only need the leading text, so they run
+    # alongside embedding instead of after it.
+    header = [
+        *embed_tasks,
+        summarize_document.s(
+            document_id, leading_text[:10000], trace_context=trace_context
+        ),
+        classify_document.s(
+            document_id, leading_text[:2000], trace_context=trace_context
+        ),
+    ]
+    chord(header)(
+        finalize_document.s(
+            document_id, started_at, trace_context=trace_context
+        ).on_error(on_pipeline_error.s(document_id))
+    )
+
+    return {**staged, "status": "dispatched", "embedding_tasks": len(embed_tasks)}
+
+
+def _embed_pending_chunks(db, task, pending: list) -> int:
+    """
+    Embed pending chunk rows (id, document_id, content), possibly spanning
+    several documents, and store their vectors. Returns the number of
+    embedding inputs sent to the API.
+
+    Identical chunk text is embedded once, here or by any earlier document.
+    Rate-limited failures are retried by `task`; batches already stored are
+    kept.
+    """
+    rows_by_hash: dict[str, list] = {}
+    for row in pending:
+        rows_by_hash.setdefault(chunk_hash(row.content), []).append(row)
+    known = get_chunk_embeddings(db, list(rows_by_hash))
+    reused = [h for h in rows_by_hash if h in known]
+    missing = [h for h in rows_by_hash if h not in known]
+    telemetry.record_cache("chunk_embedding", True, len(reused))
+    telemetry.record_cache("chunk_embedding", False, len(missing))
+
+    def store(hashes: list[str], embeddings: list[list[float]]) -> dict[str, int]:
+        chunk_ids, chunk_embeddings = [], []
+        stored: dict[str, int] = {}
+        for content_hash, embedding in zip(hashes, embeddings):
+            for row in rows_by_hash[content_hash]:
+                chunk_ids.append(row.id)
+                chunk_embeddings.append(embedding)
+                document_id = str(row.document_id)
+                stored[document_id] = stored.get(document_id, 0) + 1
+        bulk_update_embeddings(db, chunk_ids, chunk_embeddings)
+        telemetry.CHUNKS.labels("embedded").inc(len(chunk_ids))
+        return stored
+
+    def report(stored: dict[str, int]) -> None:
+        for document_id, count in stored.items():
+            record_embedded(document_id, count)
 
+    if reused:
+        stored = store(reused, [known[h] for h in reused])
+        db.commit()
+        report(stored)
+
+    def store_batch(start: int, embeddings: list[list[float]]) -> None:
+        hashes = missing[start : start + len(embeddings)]
+        stored = store(hashes, embeddings)
+        store_chunk_embeddings(db, hashes, embeddings)
+        db.commit()
+        report(stored)
+
+    try:
+        generate_embeddings_batched(
+            [rows_by_hash[h][0].content for h in missing], store_batch
+        )
+    except Exception as e:
+        db.rollback()
+        # Throttled: retry later; batches already stored are kept
+        if is_rate_limit_error(e) and task.request.retries < task.max_retries:
+            raise task.retry(exc=e, countdown=30 * (task.request.retries + 1))
+        raise
+
+    return len(missing)
+
+
+@celery_app.task(bind=True, name="embed_chunks", max_retries=5)
+def embed_chunks(
+    self,
+    document_id: str,
+    first_index: int,
+    last_index: int,
+    trace_context: dict | None = None,
+):
+    """Embed a document's chunks in [first_index, last_index] missing a vector."""
+    started_at = time.time()
+
+    with SyncSession() as db, telemetry.span(
+        "embed_chunks", parent=trace_context, document_id=document_id
+    ):
+        pending = (
+            db.query(DocumentChunk.id, DocumentChunk.document_id, DocumentChunk.content)
+            .filter(DocumentChunk.document_id == uuid.UUID(document_id))
+            .filter(DocumentChunk.chunk_index.between(first_index, last_index))
+            .filter(DocumentChunk.embedding.is_(None))
+            .order_by(DocumentChunk.chunk_index)
+            .all()
+        )
+        requests = _embed_pending_chunks(db, self, pending)
+
+    finished_at = time.time()
+    telemetry.PIPELINE_STAGE_SECONDS.labels("embed").observe(finished_at - started_at)
+    return {
+        "stage": "embedding",
+        "embedded": len(pending),
+        "embedding_requests": requests,
+        "started_at": started_at,
+        "finished_at": finished_at,
+    }
+
+
+@celery_app.task(name="summarize_document")
+def summarize_document(document_id: str, text: str, trace_context: dict | None = None):
+    """Generate and store the document summary, unless already present."""
+    with SyncSession() as db, telemetry.span(
+        "summarize_document", parent=trace_context, document_id=document_id
+    ), telemetry.timed(telemetry.PIPELINE_STAGE_SECONDS, stage="summarize"):
+        document = (
+            db.query(Document).filter(Document.id == uuid.UUID(document_id)).first()
+        )
+        if not document:
+            raise ValueError(f"Document {document_id} not found")
+
+        if not document.summary:
+            summary_prompt = build_summary_prompt(text)
+            document.summary = generate_response(summary_prompt, SYSTEM_PROMPT_SUMMARY)
             db.commit()
 
-            # Step 4: Generate summary
-            self.update_state(state="PROGRESS", meta={"step": "summarizing"})
-            # Use first ~10000 chars for summary to stay within context limits
-            summary_text = text[:10000]
-            summary_prompt = build_summary_prompt(summary_text)
-            summary = generate_response(summary_prompt, SYSTEM_PROMPT_SUMMARY)
-            document.summary = summary
-
-            # Step 5: Classify document
-            self.update_state(state="PROGRESS", meta={"step": "classifying"})
-            classification_prompt = build_classification_prompt(text, summary)
+        return {"stage": "summarizing", "summary_length": len(document.summary)}
+
+
+@celery_app.task(name="classify_document")
+def classify_document(document_id: str, text: str, trace_context: dict | None = None):
+    """Classify the document from its leading text, unless already classified."""
+    with SyncSession() as db, telemetry.span(
+        "classify_document", parent=trace_context, document_id=document_id
+    ), telemetry.timed(telemetry.PIPELINE_STAGE_SECONDS, stage="classify"):
+        document = (
+            db.query(Document).filter(Document.id == uuid.UUID(document_id)).first()
+        )
+        if not document:
+            raise ValueError(f"Document {document_id} not found")
+
+        if not document.classification:
+            classification_prompt = build_classification_prompt(text)
             classification = generate_response(
                 classification_prompt, SYSTEM_PROMPT_CLASSIFICATION
             )
             document.classification = classification.strip()
-
-            # Mark as completed
-            document.status = DocumentStatus.COMPLETED
             db.commit()
 
-            return {
-                "document_id": document_id,
-                "status": "completed",
-                "chunks_created": len(chunks),
-                "summary_length": len(summary),
-                "classification": document.classification,
-            }
+        return {"stage": "classifying", "classification": document.classification}
 
-        except Exception as e:
-            # Mark as failed
-            document = db.query(Document).filter(Document.id == doc_uuid).first()
-            if document:
-                document.status = DocumentStatus.FAILED
-                document.error_message = str(e)
-                db.commit()
-            raise
+
+def _complete_document(db, document_id: str) -> Document:
+    """Mark a document completed once every stage has persisted its output."""
+    doc_uuid = uuid.UUID(document_id)
+    document = db.query(Document).filter(Document.id == doc_uuid).first()
+    if not document:
+        raise ValueError(f"Document {document_id} not found")
+    publish_progress(document_id, "finalizing")
+
+    missing = (
+        db.query(func.count(DocumentChunk.id))
+        .filter(DocumentChunk.document_id == doc_uuid)
+        .filter(DocumentChunk.embedding.is_(None))
+        .scalar()
+    )
+    if missing:
+        raise ValueError(f"{missing} chunks are missing embeddings")
+    if document.summary is None or document.classification is None:
+        raise ValueError("Summary or classification was not generated")
+
+    # Mark as completed
+    document.status = DocumentStatus.COMPLETED
+    document.error_message = None
+    db.commit()
+    publish_progress(document_id, "completed", status="completed")
+    return document
+
+
+def _embedding_throughput(results: list[dict]) -> dict:
+    """Aggregate wall-clock embedding throughput over embed task results."""
+    embedding_results = [r for r in results if r["stage"] == "embedding"]
+    embedded = sum(r["embedded"] for r in embedding_results)
+    embed_seconds = 0.0
+    if embedding_results:
+        embed_seconds = max(r["finished_at"] for r in embedding_results) - min(
+            r["started_at"] for r in embedding_results
+        )
+    return {
+        "chunks_embedded": embedded,
+        "embedding_seconds": round(embed_seconds, 3),
+        "embedding_chunks_per_second": (
+            round(embedded / embed_seconds, 2) if embed_seconds else 0.0
+        ),
+    }
+
+
+@celery_app.task(name="finalize_document")
+def finalize_document(
+    results: list[dict],
+    document_id: str,
+    started_at: float,
+    trace_context: dict | None = None,
+):
+    """Chord callback: mark the document completed and aggregate stage results."""
+    with SyncSession() as db, telemetry.span(
+        "finalize_document", parent=trace_context, document_id=document_id
+    ):
+        with telemetry.timed(telemetry.PIPELINE_STAGE_SECONDS, stage="finalize"):
+            document = _complete_document(db, document_id)
+        total_seconds = time.time() - started_at
+        telemetry.PIPELINE_STAGE_SECONDS.labels("pipeline").observe(total_seconds)
+
+        return {
+            "document_id": document_id,
+            "status": "completed",
+            **_embedding_throughput(results),
+            "summary_length": len(document.summary or ""),
+            "classification": document.classification,
+            "total_seconds": round(total_seconds, 3),
+        }
+
+
+@celery_app.task(name="on_pipeline_error")
+def on_pipeline_error(request, exc, traceback, document_id: str):
+    """Chord errback: mark the document failed when any stage fails."""
+    _mark_failed(document_id, str(exc))
+
+
+@celery_app.task(bind=True, name="stage_document")
+def stage_document(
+    self, document_id: str, file_path: str, trace_context: dict | None = None
+):
+    """
+    Batch pipeline stage: parse, chunk and stage one document.
+
+    Failures are recorded on the document and reported in the result rather
+    than raised, so one bad file does not stop the rest of its batch.
+    """
+    try:
+        with telemetry.span(
+            "stage_document", parent=trace_context, document_id=document_id
+        ):
+            staged = _stage_document(self, document_id, file_path)
+    except Exception as e:
+        return {"document_id": document_id, "status": "failed", "error": str(e)}
+
+    staged.pop("pending_indexes", None)
+    return staged
+
+
+def enqueue_batch(
+    batch_id: str,
+    documents: list[tuple[str, str]],
+    trace_context: dict | None = None,
+) -> None:
+    """
+    Queue a batch of (document_id, file_path) uploads. Documents are staged
+    by a group of stage_document tasks, then dispatch_batch embeds them
+    together.
+    """
+    staging = [
+        stage_document.s(document_id, path, trace_context=trace_context)
+        for document_id, path in documents
+    ]
+    chord(staging)(dispatch_batch.s(batch_id, time.time(), trace_context=trace_context))
+
+
+def _pack_chunk_ranges(
+    pending: list[tuple[uuid.UUID, int]], per_task: int
+) -> list[list[list]]:
+    """
+    Pack (document_id, chunk_index) pairs, ordered by document and index,
+    into tasks of up to `per_task` chunks. Each task is a list of
+    [document_id, first_index, last_index] ranges, so small documents share
+    a task and fill whole embedding API batches.
+    """
+    tasks: list[list[list]] = []
+    current: list[list] = []
+    size = 0
+    for document_id, chunk_index in pending:
+        if size == per_task:
+            tasks.append(current)
+            current, size = [], 0
+        if current and current[-1][0] == str(document_id):
+            current[-1][2] = chunk_index
+        else:
+            current.append([str(document_id), chunk_index, chunk_index])
+        size += 1
+    if current:
+        tasks.append(current)
+    return tasks
+
+
+@celery_app.task(name="dispatch_batch")
+def dispatch_batch(
+    results: list[dict],
+    batch_id: str,
+    started_at: float,
+    trace_context: dict | None = None,
+):
+    """
+    Chord callback of the staging group: dispatch embedding, summary and
+    classification for every staged document of a batch as one chord.
+
+    Pending chunks of all documents are packed together, so embedding calls
+    are coalesced across the batch instead of sending small per-document
+    requests.
+    """
+    staged = [r for r in results if r["status"] == "staged"]
+    if not staged:
+        return {"batch_id": batch_id, "status": "completed", "staged": 0}
+
+    document_ids = [r["document_id"] for r in staged]
+    with SyncSession() as db:
+        pending = (
+            db.query(DocumentChunk.document_id, DocumentChunk.chunk_index)
+            .filter(DocumentChunk.document_id.in_(map(uuid.UUID, document_ids)))
+            .filter(DocumentChunk.embedding.is_(None))
+            .order_by(DocumentChunk.document_id, DocumentChunk.chunk_index)
+            .all()
+        )
+
+    totals: dict[str, int] = {}
+    for document_id, _ in pending:
+        totals[str(document_id)] = totals.get(str(document_id), 0) + 1
+    for document_id in document_ids:
+        start_embedding(document_id, totals.get(document_id, 0))
+
+    ranges = _pack_chunk_ranges(pending, settings.embedding_chunks_per_task)
+    header = [
+        embed_chunk_ranges.s(task_ranges, trace_context=trace_context)
+        for task_ranges in ranges
+    ]
+    for result in staged:
+        header.append(
+            summarize_document.s(
+                result["document_id"],
+                result["leading_text"],
+                trace_context=trace_context,
+            )
+        )
+        header.append(
+            classify_document.s(
+                result["document_id"],
+                result["leading_text"][:2000],
+                trace_context=trace_context,
+            )
+        )
+
+    chord(header)(
+        finalize_batch.s(
+            batch_id, document_ids, started_at, trace_context=trace_context
+        ).on_error(on_batch_error.s(document_ids))
+    )
+
+    return {
+        "batch_id": batch_id,
+        "status": "dispatched",
+        "staged": len(staged),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "embedding_tasks": len(ranges),
+    }
+
+
+@celery_app.task(bind=True, name="embed_chunk_ranges", max_retries=5)
+def embed_chunk_ranges(self, ranges: list[list], trace_context: dict | None = None):
+    """Embed missing vectors for [document_id, first_index, last_index] ranges."""
+    started_at = time.time()
+
+    with SyncSession() as db, telemetry.span(
+        "embed_chunk_ranges", parent=trace_context, ranges=len(ranges)
+    ):
+        pending = (
+            db.query(DocumentChunk.id, DocumentChunk.document_id, DocumentChunk.content)
+            .filter(
+                or_(
+                    *(
+                        and_(
+                            DocumentChunk.document_id == uuid.UUID(document_id),
+                            DocumentChunk.chunk_index.between(first, last),
+                        )
+                        for document_id, first, last in ranges
+                    )
+                )
+            )
+            .filter(DocumentChunk.embedding.is_(None))
+            .order_by(DocumentChunk.document_id, DocumentChunk.chunk_index)
+            .all()
+        )
+        requests = _embed_pending_chunks(db, self, pending)
+
+    finished_at = time.time()
+    telemetry.PIPELINE_STAGE_SECONDS.labels("embed").observe(finished_at - started_at)
+    return {
+        "stage": "embedding",
+        "embedded": len(pending),
+        "embedding_requests": requests,
+        "started_at": started_at,
+        "finished_at": finished_at,
+    }
+
+
+def _finalize_batch_documents(
+    document_ids: list[str], cause: str | None = None
+) -> dict[str, list[str]]:
+    """Complete each document that has all its outputs; fail the others."""
+    outcome: dict[str, list[str]] = {"completed": [], "failed": []}
+    for document_id in document_ids:
+        with SyncSession() as db:
+            try:
+                _complete_document(db, document_id)
+            except ValueError as e:
+                db.rollback()
+                _mark_failed(document_id, f"{e}: {cause}" if cause else str(e))
+                outcome["failed"].append(document_id)
+            else:
+                outcome["completed"].append(document_id)
+    return outcome
+
+
+@celery_app.task(name="finalize_batch")
+def finalize_batch(
+    results: list[dict],
+    batch_id: str,
+    document_ids: list[str],
+    started_at: float,
+    trace_context: dict | None = None,
+):
+    """Chord callback: complete the batch's documents and aggregate results."""
+    with telemetry.span("finalize_batch", parent=trace_context, batch_id=batch_id):
+        with telemetry.timed(telemetry.PIPELINE_STAGE_SECONDS, stage="finalize"):
+            outcome = _finalize_batch_documents(document_ids)
+    return {
+        "batch_id": batch_id,
+        "completed": len(outcome["completed"]),
+        "failed": len(outcome["failed"]),
+        **_embedding_throughput(results),
+        "total_seconds": round(time.time() - started_at, 3),
+    }
+
+
+@celery_app.task(name="on_batch_error")
+def on_batch_error(request, exc, traceback, document_ids: list[str]):
+    """
+    Chord errback: a stage failed for some document of the batch. Documents
+    whose outputs are all persisted still complete; the rest are failed.
+    """
+    _finalize_batch_documents(document_ids, cause=str(exc))
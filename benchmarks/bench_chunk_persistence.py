@@ -0,0 +1,139 @@
+"""
+Benchmark chunk persistence strategies against the configured database.
+
+Compares the original per-row ORM loop with the bulk paths used by the
+worker (executemany and COPY). Requires a migrated database reachable at
+DATABASE_URL_SYNC.
+
+    python -m benchmarks.bench_chunk_persistence --rows 5000
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from app.config import get_settings
+from app.models.database import (
+    Document,
+    DocumentChunk,
+    DocumentStatus,
+    bulk_insert_chunks,
+    bulk_update_embeddings,
+)
+from app.workers.tasks import SyncSession
+
+settings = get_settings()
+
+DIMENSION = settings.embedding_dimension
+
+
+def _make_rows(count: int) -> tuple[list[str], list[list[float]]]:
+    rng = random.Random(0)
+    contents = [f"chunk {i} " + "lorem ipsum " * 80 for i in range(count)]
+    embeddings = [[rng.uniform(-1, 1) for _ in range(DIMENSION)] for _ in range(count)]
+    return contents, embeddings
+
+
+def _create_document(db) -> uuid.UUID:
+    document = Document(
+        filename="benchmark.txt",
+        content_type="text/plain",
+        status=DocumentStatus.PROCESSING,
+    )
+    db.add(document)
+    db.commit()
+    return document.id
+
+
+def bench_orm_loop(db, document_id, contents, embeddings, batch_size):
+    for start in range(0, len(contents), batch_size):
+        for i in range(start, min(start + batch_size, len(contents))):
+            db.add(
+                DocumentChunk(
+                    document_id=document_id,
+                    content=contents[i],
+                    chunk_index=i,
+                    embedding=embeddings[i],
+                    embedding_half=embeddings[i],
+                    chunk_metadata={"char_count": len(contents[i])},
+                )
+            )
+        db.commit()
+
+
+def bench_bulk(db, document_id, contents, embeddings, batch_size):
+    for start in range(0, len(contents), batch_size):
+        bulk_insert_chunks(
+            db,
+            [
+                {
+                    "document_id": document_id,
+                    "content": contents[i],
+                    "chunk_index": i,
+                    "chunk_metadata": {"char_count": len(contents[i])},
+                }
+                for i in range(start, min(start + batch_size, len(contents)))
+            ],
+        )
+        db.commit()
+
+    chunk_ids = [
+        row.id
+        for row in db.query(DocumentChunk.id)
+        .filter(DocumentChunk.document_id == document_id)
+        .order_by(DocumentChunk.chunk_index)
+    ]
+    for start in range(0, len(chunk_ids), batch_size):
+        bulk_update_embeddings(
+            db,
+            chunk_ids[start : start + batch_size],
+            embeddings[start : start + batch_size],
+        )
+        db.commit()
+
+
+def run(rows: int, batch_size: int) -> dict[str, float]:
+    contents, embeddings = _make_rows(rows)
+    strategies = {
+        "orm_loop": (bench_orm_loop, None),
+        "executemany": (bench_bulk, "executemany"),
+        "copy": (bench_bulk, "copy"),
+    }
+    results = {}
+
+    for name, (func, method) in strategies.items():
+        if method:
+            settings.chunk_write_method = method
+        with SyncSession() as db:
+            document_id = _create_document(db)
+            try:
+                started = time.perf_counter()
+                func(db, document_id, contents, embeddings, batch_size)
+                elapsed = time.perf_counter() - started
+            finally:
+                db.rollback()
+                db.query(Document).filter(Document.id == document_id).delete()
+                db.commit()
+        results[name] = rows / elapsed
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    results = run(args.rows, args.batch_size)
+    baseline = results["orm_loop"]
+    for name, rows_per_second in results.items():
+        print(
+            f"{name:<12} {rows_per_second:>10.1f} rows/s"
+            f"  ({rows_per_second / baseline:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark the chunking engines on large synthetic texts.
+
+Compares LangChain's recursive splitter with the linear-pass chunker on
+prose (paragraphs and sentences) and on a single line with only spaces to
+split at, the case LangChain's split-and-merge handles worst. Throughput is
+reported in MB/s of input text.
+
+    python -m benchmarks.bench_chunking --size-mb 50
+"""
+
+import argparse
+import time
+
+from app.config import get_settings
+from app.core import chunking
+from benchmarks.synthetic import paragraphs
+
+settings = get_settings()
+
+
+def _inputs(size_mb: int) -> dict[str, str]:
+    prose = paragraphs(size_mb * 1024 * 1024)
+    return {
+        "prose": prose,
+        "single_line": prose.replace("\n", " ").replace(". ", " "),
+    }
+
+
+def _blocks(text: str, block_chars: int = 4000) -> list[dict]:
+    # Blocks of one page, as TXT files are read, so they join back into text
+    return [
+        {"page_number": 1, "text": text[i : i + block_chars]}
+        for i in range(0, len(text), block_chars)
+    ]
+
+
+def run(size_mb: int) -> dict[str, dict[str, dict]]:
+    results: dict[str, dict[str, dict]] = {}
+    for name, text in _inputs(size_mb).items():
+        blocks = _blocks(text)
+        engines = {
+            "langchain": lambda: chunking._chunk_text_langchain(text),
+            "fast": lambda: chunking.chunk_text(text),
+            "fast_stream": lambda: list(chunking.iter_chunks(blocks)),
+        }
+        results[name] = {}
+        for engine, func in engines.items():
+            started = time.perf_counter()
+            chunks = func()
+            elapsed = time.perf_counter() - started
+            results[name][engine] = {
+                "chunks": len(chunks),
+                "seconds": elapsed,
+                "mb_per_second": len(text) / elapsed / 1e6,
+            }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=50)
+    args = parser.parse_args()
+
+    # The streaming path follows the configured engine
+    settings.chunker = "fast"
+    results = run(args.size_mb)
+    for name, engines in results.items():
+        baseline = engines["langchain"]["mb_per_second"]
+        for engine, result in engines.items():
+            print(
+                f"{name:<12} {engine:<12} {result['mb_per_second']:>8.1f} MB/s"
+                f"  {result['chunks']:>8} chunks"
+                f"  ({result['mb_per_second'] / baseline:.2f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark of per-call LLM client overhead.
+
+Compares constructing a ChatGoogleGenerativeAI client on every call (the
+previous behaviour of get_llm) with the cached client now returned by
+get_llm. No API requests are made, so a placeholder key is enough.
+
+    python -m benchmarks.bench_llm_client --calls 200
+"""
+
+import argparse
+import time
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from app.config import get_settings
+from app.core.llm import get_llm
+
+settings = get_settings()
+
+
+def _construct_per_call() -> ChatGoogleGenerativeAI:
+    return ChatGoogleGenerativeAI(
+        model=settings.llm_model,
+        google_api_key=settings.google_api_key or "benchmark",
+        temperature=0.7,
+    )
+
+
+def _time_calls(func, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls
+
+
+def run(calls: int) -> dict[str, float]:
+    if not settings.google_api_key:
+        settings.google_api_key = "benchmark"
+
+    return {
+        "per_call_construction": _time_calls(_construct_per_call, calls),
+        "cached_client": _time_calls(get_llm, calls),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    results = run(args.calls)
+    for name, seconds in results.items():
+        print(f"{name:<22} {seconds * 1e6:>10.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
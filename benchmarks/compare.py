@@ -0,0 +1,61 @@
+"""
+Compare two benchmark suite reports.
+
+Prints every numeric result present in both reports with the old value, the
+new value and their ratio.
+
+    python -m benchmarks.compare before.json after.json
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+
+def _flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(old: dict, new: dict) -> list[tuple[str, float, float, float | None]]:
+    old_flat, new_flat = _flatten(old["results"]), _flatten(new["results"])
+    return [
+        (
+            key,
+            old_flat[key],
+            new_flat[key],
+            new_flat[key] / old_flat[key] if old_flat[key] else None,
+        )
+        for key in old_flat
+        if key in new_flat
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("old")
+    parser.add_argument("new")
+    args = parser.parse_args()
+
+    old = json.loads(Path(args.old).read_text())
+    new = json.loads(Path(args.new).read_text())
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    rows = compare(old, new)
+    width = max((len(key) for key, *_ in rows), default=0)
+    for key, old_value, new_value, ratio in rows:
+        ratio_text = f"{ratio:.2f}x" if ratio is not None else "-"
+        print(
+            f"{key:<{width}}  {old_value:>14.6g}  {new_value:>14.6g}  {ratio_text:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Deterministic stand-ins for the embedding provider and the chat LLM.
+
+`install_fake_embeddings` and `install_fake_llm` swap them into
+app.core.embeddings and app.core.llm, so the ingest and chat paths run
+unchanged without calling Google APIs. Latencies are simulated with sleeps
+and are configurable to model a remote service.
+"""
+
+import asyncio
+import hashlib
+import time
+
+import numpy as np
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from app.config import get_settings
+from app.core import embedding_cache, embeddings, llm
+from app.core.embedding_providers import EmbeddingProvider
+
+settings = get_settings()
+
+
+class FakeEmbeddingProvider(EmbeddingProvider):
+    """
+    Embeds text as a unit vector seeded by its SHA-256, so identical text
+    always gets the same vector. Each call sleeps `latency_seconds` plus
+    `per_text_seconds` per input.
+    """
+
+    name = "fake"
+    remote = False
+
+    def __init__(
+        self,
+        dimension: int,
+        latency_seconds: float = 0.0,
+        per_text_seconds: float = 0.0,
+    ):
+        super().__init__("fake")
+        self._dimension = dimension
+        self.latency_seconds = latency_seconds
+        self.per_text_seconds = per_text_seconds
+        self.calls = 0
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def _vector(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        vector = np.random.default_rng(seed).standard_normal(self._dimension)
+        return (vector / np.linalg.norm(vector)).astype(np.float32).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        time.sleep(self.latency_seconds + self.per_text_seconds * len(texts))
+        return [self._vector(text) for text in texts]
+
+
+class FakeChatModel:
+    """
+    Replies with a fixed answer of `tokens` words. Streaming waits
+    `first_token_seconds` before the first token and `token_seconds`
+    between the rest.
+    """
+
+    def __init__(
+        self,
+        tokens: int = 50,
+        first_token_seconds: float = 0.0,
+        token_seconds: float = 0.0,
+    ):
+        self.tokens = [f"word{i} " for i in range(tokens)]
+        self.first_token_seconds = first_token_seconds
+        self.token_seconds = token_seconds
+
+    def invoke(self, messages) -> AIMessage:
+        time.sleep(self.first_token_seconds + self.token_seconds * len(self.tokens))
+        return AIMessage(content="".join(self.tokens))
+
+    async def astream(self, messages):
+        await asyncio.sleep(self.first_token_seconds)
+        for i, token in enumerate(self.tokens):
+            if i:
+                await asyncio.sleep(self.token_seconds)
+            yield AIMessageChunk(content=token)
+
+
+def install_fake_embeddings(
+    dimension: int | None = None,
+    latency_seconds: float = 0.0,
+    per_text_seconds: float = 0.0,
+    query_cache: bool = False,
+) -> FakeEmbeddingProvider:
+    """
+    Route all embedding calls to a fake provider. The query embedding cache
+    is replaced with an in-process one (disabled unless `query_cache`), so
+    no Redis is needed either.
+    """
+    provider = FakeEmbeddingProvider(
+        dimension or settings.embedding_dimension, latency_seconds, per_text_seconds
+    )
+    embeddings.get_embedding_provider = lambda: provider
+    embedding_cache._query_cache = embedding_cache.QueryEmbeddingCache(
+        max_size=settings.query_cache_size if query_cache else 0,
+        ttl_seconds=settings.query_cache_ttl_seconds,
+        use_redis=False,
+        redis_ttl_seconds=settings.query_cache_redis_ttl_seconds,
+    )
+    return provider
+
+
+def install_fake_llm(
+    tokens: int = 50,
+    first_token_seconds: float = 0.0,
+    token_seconds: float = 0.0,
+) -> FakeChatModel:
+    """Route all LLM calls to a fake chat model."""
+    model = FakeChatModel(tokens, first_token_seconds, token_seconds)
+    llm.get_llm = lambda model_name=None, temperature=0.7: model
+    return model
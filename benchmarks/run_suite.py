@@ -0,0 +1,401 @@
+"""
+End-to-end benchmark suite with fake embedding and LLM providers.
+
+Measures parsing, chunking, embedding batching, chunk persistence, vector
+search latency and SSE time-to-first-token under concurrent chat load, and
+writes the results to JSON so runs can be diffed between commits with
+`python -m benchmarks.compare`. No Google API calls are made. The
+persistence, search and chat benchmarks need a migrated pgvector database
+at DATABASE_URL / DATABASE_URL_SYNC and are skipped if it is unreachable.
+
+    python -m benchmarks.run_suite --output bench.json
+    python -m benchmarks.run_suite --only parse,chunk,embed --quick
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from app.config import get_settings
+from benchmarks.fakes import install_fake_embeddings, install_fake_llm
+from benchmarks.synthetic import paragraphs, write_pdf, write_txt
+
+settings = get_settings()
+
+BENCHMARKS = ["parse", "chunk", "embed", "persist", "search", "chat"]
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def _best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def bench_parse(args, workdir: Path) -> dict:
+    from app.core.parsing import parse_document
+
+    files = [
+        write_txt(workdir / f"doc_{size}mb.txt", size * 1024 * 1024)
+        for size in args.txt_sizes_mb
+    ] + [write_pdf(workdir / f"doc_{pages}p.pdf", pages) for pages in args.pdf_pages]
+
+    results = {}
+    for path in files:
+        size = path.stat().st_size
+        seconds = _best_of(args.repeat, lambda: parse_document(str(path)))
+        results[path.name] = {
+            "bytes": size,
+            "seconds": round(seconds, 4),
+            "mb_per_second": round(size / seconds / 1e6, 2),
+        }
+    return results
+
+
+def bench_chunk(args, workdir: Path) -> dict:
+    from app.core.chunking import chunk_text, iter_chunks
+
+    text = paragraphs(args.chunk_text_mb * 1024 * 1024)
+    page_size = 4000
+    pages = [
+        {"page_number": i // page_size + 1, "text": text[i : i + page_size]}
+        for i in range(0, len(text), page_size)
+    ]
+
+    chunk_count = len(chunk_text(text))
+    results = {"chars": len(text), "chunks": chunk_count}
+    for name, func in {
+        "chunk_text": lambda: chunk_text(text),
+        "iter_chunks": lambda: sum(1 for _ in iter_chunks(pages)),
+    }.items():
+        seconds = _best_of(args.repeat, func)
+        results[name] = {
+            "seconds": round(seconds, 4),
+            "mb_per_second": round(len(text) / seconds / 1e6, 2),
+        }
+    return results
+
+
+def bench_embed(args, workdir: Path) -> dict:
+    from app.core.embeddings import generate_embeddings_batched
+
+    provider = install_fake_embeddings(
+        latency_seconds=args.embed_latency_ms / 1000,
+        per_text_seconds=args.embed_per_text_ms / 1000,
+    )
+    texts = [f"chunk {i} " + paragraphs(800, seed=i) for i in range(args.embed_texts)]
+
+    started = time.perf_counter()
+    generate_embeddings_batched(texts, lambda start, embeddings: None)
+    seconds = time.perf_counter() - started
+    return {
+        "texts": len(texts),
+        "batch_size": settings.embedding_batch_size,
+        "max_inflight": settings.embedding_max_inflight_batches,
+        "provider_calls": provider.calls,
+        "seconds": round(seconds, 4),
+        "chunks_per_second": round(len(texts) / seconds, 1),
+    }
+
+
+def bench_persist(args, workdir: Path) -> dict:
+    from benchmarks.bench_chunk_persistence import run
+
+    results = run(args.persist_rows, settings.chunk_insert_batch_size)
+    return {name: {"rows_per_second": round(rate, 1)} for name, rate in results.items()}
+
+
+def _seed_document(chunks: int) -> uuid.UUID:
+    """Create a completed document with fake-embedded chunks."""
+    from app.core.embeddings import generate_embeddings
+    from app.models.database import (
+        Document,
+        DocumentChunk,
+        DocumentStatus,
+        bulk_insert_chunks,
+        bulk_update_embeddings,
+    )
+    from app.workers.tasks import SyncSession
+
+    contents = [f"chunk {i} " + paragraphs(900, seed=i) for i in range(chunks)]
+    with SyncSession() as db:
+        document = Document(
+            filename="benchmark.txt",
+            content_type="text/plain",
+            status=DocumentStatus.COMPLETED,
+            summary="Synthetic benchmark document.",
+            classification="Other",
+        )
+        db.add(document)
+        db.commit()
+
+        for start in range(0, chunks, settings.chunk_insert_batch_size):
+            end = min(start + settings.chunk_insert_batch_size, chunks)
+            bulk_insert_chunks(
+                db,
+                [
+                    {
+                        "document_id": document.id,
+                        "content": contents[i],
+                        "chunk_index": i,
+                        "chunk_metadata": {"char_count": len(contents[i])},
+                    }
+                    for i in range(start, end)
+                ],
+            )
+            db.commit()
+
+        rows = (
+            db.query(DocumentChunk.id, DocumentChunk.content)
+            .filter(DocumentChunk.document_id == document.id)
+            .order_by(DocumentChunk.chunk_index)
+            .all()
+        )
+        for start in range(0, len(rows), settings.chunk_insert_batch_size):
+            batch = rows[start : start + settings.chunk_insert_batch_size]
+            bulk_update_embeddings(
+                db,
+                [row.id for row in batch],
+                generate_embeddings([row.content for row in batch]),
+            )
+            db.commit()
+        return document.id
+
+
+def _delete_document(document_id: uuid.UUID) -> None:
+    from app.models.database import Document
+    from app.workers.tasks import SyncSession
+
+    with SyncSession() as db:
+        db.query(Document).filter(Document.id == document_id).delete()
+        db.commit()
+
+
+async def _bench_search(args, document_id: uuid.UUID) -> dict:
+    from app.core.retrieval import search_similar_chunks
+    from app.models.database import Document, async_session, engine
+
+    queries = [f"question {i} about payment terms" for i in range(args.search_queries)]
+    results = {}
+    try:
+        async with async_session() as db:
+            updated_at = await db.scalar(
+                select(Document.updated_at).where(Document.id == document_id)
+            )
+
+        for name, cache_enabled in [("postgres", False), ("vector_cache", True)]:
+            settings.vector_cache_enabled = cache_enabled
+            samples = []
+            for query in queries:
+                async with async_session() as db:
+                    started = time.perf_counter()
+                    await search_similar_chunks(
+                        db, document_id, query, top_k=5, updated_at=updated_at
+                    )
+                    samples.append(time.perf_counter() - started)
+            # The first cached query loads the document; report steady state
+            results[name] = _percentiles(samples[1:] if cache_enabled else samples)
+    finally:
+        settings.vector_cache_enabled = False
+        await engine.dispose()
+    return results
+
+
+async def _chat_ttft(client: httpx.AsyncClient, document_id: uuid.UUID, i: int):
+    started = time.perf_counter()
+    first_token = None
+    payload = {"document_id": str(document_id), "message": f"What is clause {i}?"}
+    async with client.stream("POST", "/chat", json=payload) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if first_token is None and line == "event: token":
+                first_token = time.perf_counter() - started
+    return first_token, time.perf_counter() - started
+
+
+async def _bench_chat(args, document_id: uuid.UUID) -> dict:
+    from app.main import app
+    from app.models.database import engine
+
+    install_fake_llm(
+        tokens=args.llm_tokens,
+        first_token_seconds=args.llm_first_token_ms / 1000,
+        token_seconds=args.llm_token_ms / 1000,
+    )
+    # Every request must reach the LLM path, without Redis
+    settings.response_cache_enabled = False
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=120
+        ) as client:
+            await _chat_ttft(client, document_id, -1)  # warm up
+            for concurrency in args.chat_concurrency:
+                started = time.perf_counter()
+                timings = await _run_concurrent(
+                    client, document_id, concurrency, args.chat_rounds
+                )
+                elapsed = time.perf_counter() - started
+                results[f"concurrency_{concurrency}"] = {
+                    "requests": len(timings),
+                    "ttft": _percentiles([t for t, _ in timings]),
+                    "total": _percentiles([t for _, t in timings]),
+                    "requests_per_second": round(len(timings) / elapsed, 2),
+                }
+    finally:
+        await engine.dispose()
+    return results
+
+
+async def _run_concurrent(client, document_id, concurrency: int, rounds: int):
+    """Run `concurrency` clients, each sending `rounds` requests back to back."""
+
+    async def worker(worker_id: int):
+        return [
+            await _chat_ttft(client, document_id, worker_id * rounds + i)
+            for i in range(rounds)
+        ]
+
+    per_worker = await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    return [timing for timings in per_worker for timing in timings]
+
+
+def run(args) -> dict:
+    selected = args.only or BENCHMARKS
+    results: dict[str, dict] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        for name in ["parse", "chunk", "embed"]:
+            if name in selected:
+                print(f"running {name}...", flush=True)
+                results[name] = globals()[f"bench_{name}"](args, workdir)
+
+        # Database-backed benchmarks embed with a zero-latency fake
+        install_fake_embeddings(dimension=settings.embedding_dimension)
+        try:
+            if "persist" in selected:
+                print("running persist...", flush=True)
+                results["persist"] = bench_persist(args, workdir)
+
+            if {"search", "chat"} & set(selected):
+                document_id = _seed_document(args.search_chunks)
+                try:
+                    if "search" in selected:
+                        print("running search...", flush=True)
+                        results["search"] = asyncio.run(
+                            _bench_search(args, document_id)
+                        )
+                        results["search"]["chunks"] = args.search_chunks
+                    if "chat" in selected:
+                        print("running chat...", flush=True)
+                        results["chat"] = asyncio.run(_bench_chat(args, document_id))
+                finally:
+                    _delete_document(document_id)
+        except (OperationalError, OSError) as e:
+            for name in ["persist", "search", "chat"]:
+                if name in selected and name not in results:
+                    results[name] = {
+                        "skipped": "database unavailable: " + str(e).splitlines()[0]
+                    }
+
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument(
+        "--only",
+        type=lambda value: [name for name in value.split(",") if name],
+        help=f"comma-separated subset of: {','.join(BENCHMARKS)}",
+    )
+    parser.add_argument("--quick", action="store_true", help="small inputs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--txt-sizes-mb", type=_int_list, default=[1, 10])
+    parser.add_argument("--pdf-pages", type=_int_list, default=[10, 200])
+    parser.add_argument("--chunk-text-mb", type=int, default=5)
+    parser.add_argument("--embed-texts", type=int, default=2000)
+    parser.add_argument("--embed-latency-ms", type=float, default=50.0)
+    parser.add_argument("--embed-per-text-ms", type=float, default=0.0)
+    parser.add_argument("--persist-rows", type=int, default=2000)
+    parser.add_argument("--search-chunks", type=int, default=2000)
+    parser.add_argument("--search-queries", type=int, default=50)
+    parser.add_argument("--chat-concurrency", type=_int_list, default=[1, 8, 32])
+    parser.add_argument("--chat-rounds", type=int, default=5)
+    parser.add_argument("--llm-tokens", type=int, default=50)
+    parser.add_argument("--llm-first-token-ms", type=float, default=0.0)
+    parser.add_argument("--llm-token-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.quick:
+        args.repeat = 1
+        args.txt_sizes_mb, args.pdf_pages = [1], [10]
+        args.chunk_text_mb, args.embed_texts = 1, 300
+        args.persist_rows, args.search_chunks, args.search_queries = 300, 300, 20
+        args.chat_concurrency, args.chat_rounds = [1, 8], 2
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "settings": {
+            "chunk_size": settings.chunk_size,
+            "chunk_overlap": settings.chunk_overlap,
+            "chunker": settings.chunker,
+            "embedding_dimension": settings.embedding_dimension,
+            "embedding_batch_size": settings.embedding_batch_size,
+            "embedding_max_inflight_batches": settings.embedding_max_inflight_batches,
+            "chunk_write_method": settings.chunk_write_method,
+        },
+        "args": vars(args),
+        "results": run(args),
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report["results"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Deterministic synthetic documents for benchmarks.
+
+Text is drawn from a fixed vocabulary with a seeded generator, so the same
+arguments always produce byte-identical files. PDFs are written directly
+(one text stream per page, standard Helvetica), without extra dependencies.
+"""
+
+import random
+from pathlib import Path
+
+VOCABULARY = (
+    "agreement invoice clause payment party revenue quarterly report system "
+    "network latency throughput patient treatment study analysis results "
+    "method data model policy section schedule amount total service term "
+    "the of and to in for with on by as is are was be this that"
+).split()
+
+LINE_CHARS = 90
+LINES_PER_PAGE = 50
+
+
+def paragraphs(chars: int, seed: int = 0) -> str:
+    """Generate about `chars` characters of sentences and paragraphs."""
+    rng = random.Random(seed)
+    parts: list[str] = []
+    size = 0
+    while size < chars:
+        words = rng.choices(VOCABULARY, k=rng.randint(8, 24))
+        sentence = " ".join(words).capitalize() + "."
+        separator = "\n\n" if rng.random() < 0.15 else " "
+        parts.append(sentence + separator)
+        size += len(sentence) + len(separator)
+    return "".join(parts)[:chars]
+
+
+def write_txt(path: Path, size_bytes: int, seed: int = 0) -> Path:
+    """Write a TXT document of `size_bytes` bytes."""
+    path.write_text(paragraphs(size_bytes, seed), encoding="utf-8")
+    return path
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(text: str) -> bytes:
+    lines = [text[i : i + LINE_CHARS] for i in range(0, len(text), LINE_CHARS)][
+        :LINES_PER_PAGE
+    ]
+    ops = ["BT", "/F1 9 Tf", "11 TL", "40 800 Td"]
+    for line in lines:
+        ops.append(f"({_pdf_escape(line)}) Tj T*")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def write_pdf(path: Path, pages: int, seed: int = 0) -> Path:
+    """Write a PDF of `pages` pages, each with about 4 KB of text."""
+    text = paragraphs(pages * LINE_CHARS * LINES_PER_PAGE, seed).replace("\n", " ")
+    page_chars = LINE_CHARS * LINES_PER_PAGE
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then (page, content) pairs
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for page in range(pages):
+        stream = _page_stream(text[page * page_chars : (page + 1) * page_chars])
+        page_number = len(objects) + 1
+        page_refs.append(f"{page_number} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {page_number + 1} 0 R >>".encode()
+        )
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+    objects[1] = (
+        f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {pages} >>".encode()
+    )
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+
+    path.write_bytes(bytes(output))
+    return path
@@ -0,0 +1,145 @@
+import random
+import string
+
+import pytest
+
+from app.core import chunking
+from app.core.chunking import TextChunker, chunk_text, iter_chunks
+from app.core.parsing import join_pages
+
+ENGINES = ["fast", "langchain"]
+
+
+def _random_text(rng: random.Random, length: int) -> str:
+    """Words with sentence, line and paragraph breaks, and some unbroken runs."""
+    parts = []
+    size = 0
+    while size < length:
+        roll = rng.random()
+        if roll < 0.02:
+            part = "\n\n"
+        elif roll < 0.05:
+            part = "\n"
+        elif roll < 0.1:
+            part = ". "
+        elif roll < 0.11:
+            part = "x" * rng.randint(500, 2500)
+        else:
+            word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(1, 10)))
+            part = word + " "
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+
+def _random_pages(seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    pages = []
+    for number in range(1, rng.randint(1, 10) + 1):
+        # Some pages arrive in several blocks, as TXT files do
+        for _ in range(rng.choice([1, 1, 3])):
+            pages.append(
+                {"page_number": number, "text": _random_text(rng, rng.randint(0, 4000))}
+            )
+    return pages
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request, monkeypatch):
+    monkeypatch.setattr(chunking.settings, "chunker", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_chunk_offsets_locate_content(engine, seed):
+    text = join_pages(_random_pages(seed))
+
+    for i, chunk in enumerate(chunk_text(text)):
+        assert chunk["chunk_index"] == i
+        assert text[chunk["char_start"] : chunk["char_end"]] == chunk["content"]
+        assert chunk["char_count"] == len(chunk["content"])
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_iter_chunks_matches_chunk_text(engine, seed):
+    pages = _random_pages(seed)
+    text = join_pages(pages)
+
+    streamed = list(iter_chunks(pages))
+    pageless = [
+        {key: value for key, value in chunk.items() if not key.startswith("page_")}
+        for chunk in streamed
+    ]
+    assert pageless == chunk_text(text)
+    for chunk in streamed:
+        assert text[chunk["char_start"] : chunk["char_end"]] == chunk["content"]
+
+
+def test_iter_chunks_reports_pages(engine):
+    pages = [
+        {"page_number": 1, "text": "alpha " * 300},
+        {"page_number": 2, "text": "beta " * 300},
+        {"page_number": 3, "text": ""},
+        {"page_number": 4, "text": "gamma " * 300},
+    ]
+    text = join_pages(pages)
+    page_starts = [0, text.index("beta"), text.index("gamma")]
+    page_numbers = [1, 2, 4]
+
+    def page_at(offset: int) -> int:
+        return [n for s, n in zip(page_starts, page_numbers) if s <= offset][-1]
+
+    chunks = list(iter_chunks(pages))
+    assert chunks[0]["page_start"] == 1
+    assert chunks[-1]["page_end"] == 4
+    for chunk in chunks:
+        assert chunk["page_start"] == page_at(chunk["char_start"])
+        assert chunk["page_end"] == page_at(chunk["char_end"] - 1)
+
+
+def test_iter_chunks_streams_before_input_ends(monkeypatch):
+    monkeypatch.setattr(chunking.settings, "chunker", "fast")
+    consumed = []
+
+    def pages():
+        for number in range(1, 101):
+            consumed.append(number)
+            yield {"page_number": number, "text": "word " * 400}
+
+    first = next(iter_chunks(pages()))
+    assert first["chunk_index"] == 0
+    assert len(consumed) < 10
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_fast_chunks_respect_size_overlap_and_coverage(seed):
+    chunker = TextChunker(chunk_size=1000, chunk_overlap=200)
+    text = join_pages(_random_pages(seed))
+
+    spans = list(chunker.spans(text))
+    covered = [False] * len(text)
+    for i, (start, end) in enumerate(spans):
+        assert 0 < end - start <= 1000
+        assert text[start:end] == text[start:end].strip()
+        if i:
+            previous_start, previous_end = spans[i - 1]
+            assert previous_start < start and previous_end < end
+            assert previous_end - start <= 200
+        covered[start:end] = [True] * (end - start)
+    assert all(covered[i] or char.isspace() for i, char in enumerate(text))
+
+
+def test_chunk_token_counts():
+    chunker = TextChunker(chunk_size=20, chunk_overlap=5, token_counter=len)
+    text = "one two three four five six seven"
+
+    chunks = [chunker.chunk(text, start, end) for start, end in chunker.spans(text)]
+    assert [chunk["token_count"] for chunk in chunks] == [
+        len(chunk["content"]) for chunk in chunks
+    ]
+
+
+def test_chunk_text_without_content(engine):
+    assert chunk_text("") == []
+    assert chunk_text("  \n\n ") == []
+    assert list(iter_chunks([{"page_number": 1, "text": "   "}])) == []
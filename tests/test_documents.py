@@ -0,0 +1,112 @@
+import base64
+import hashlib
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.routes import documents
+from app.api.routes.documents import _decode_cursor, _encode_cursor
+
+
+def test_cursor_round_trips():
+    created_at = datetime(2026, 10, 18, 9, 30, 12, 345678, tzinfo=timezone.utc)
+    document_id = uuid.uuid4()
+
+    cursor = _encode_cursor(created_at, document_id)
+
+    assert _decode_cursor(cursor) == (created_at, document_id)
+
+
+def test_cursor_is_url_safe():
+    created_at = datetime(2026, 10, 18, tzinfo=timezone.utc)
+    for _ in range(50):
+        cursor = _encode_cursor(created_at, uuid.uuid4())
+        assert set(cursor) <= set(
+            "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_="
+        )
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "not a cursor",
+        "%%%",
+        base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+        base64.urlsafe_b64encode(b"2026-10-18T00:00:00").decode(),
+        base64.urlsafe_b64encode(b"yesterday|" + str(uuid.uuid4()).encode()).decode(),
+        base64.urlsafe_b64encode(b"2026-10-18T00:00:00|not-a-uuid").decode(),
+        base64.urlsafe_b64encode(b"a|b|c").decode(),
+    ],
+)
+def test_invalid_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        _decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+async def _blocks(*blocks: bytes):
+    for block in blocks:
+        yield block
+
+
+@pytest.mark.asyncio
+async def test_save_upload_writes_file_and_returns_its_hash(tmp_path):
+    file_path = str(tmp_path / "upload.txt")
+
+    content_hash = await documents._save_upload(
+        _blocks(b"first ", b"second"), file_path
+    )
+
+    assert content_hash == hashlib.sha256(b"first second").hexdigest()
+    assert (tmp_path / "upload.txt").read_bytes() == b"first second"
+    assert [path.name for path in tmp_path.iterdir()] == ["upload.txt"]
+
+
+@pytest.mark.asyncio
+async def test_oversized_upload_is_rejected_and_part_file_removed(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(documents.settings, "max_file_size_mb", 1)
+    block = b"x" * (512 * 1024)
+
+    with pytest.raises(HTTPException) as error:
+        await documents._save_upload(
+            _blocks(block, block, block), str(tmp_path / "upload.pdf")
+        )
+
+    assert error.value.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+class _FailingSession:
+    def add(self, instance):
+        self.added = instance
+
+    async def commit(self):
+        raise ConnectionError("database went away")
+
+
+class _FakeTask:
+    def __init__(self):
+        self.calls = []
+
+    def delay(self, *args, **kwargs):
+        self.calls.append(args)
+
+
+@pytest.mark.asyncio
+async def test_failed_row_write_removes_saved_upload(tmp_path, monkeypatch):
+    monkeypatch.setattr(documents.settings, "upload_dir", str(tmp_path))
+    task = _FakeTask()
+    monkeypatch.setattr(documents, "process_document", task)
+
+    with pytest.raises(ConnectionError):
+        await documents._create_document(
+            _FailingSession(), "notes.txt", "text/plain", _blocks(b"hello")
+        )
+
+    assert list(tmp_path.iterdir()) == []
+    assert task.calls == []
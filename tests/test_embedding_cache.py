@@ -0,0 +1,80 @@
+import pytest
+
+from app.core import embedding_cache
+from app.core.embedding_cache import QueryEmbeddingCache
+
+
+def _cache(**overrides) -> QueryEmbeddingCache:
+    options = {
+        "max_size": 3,
+        "ttl_seconds": 60,
+        "use_redis": False,
+        "redis_ttl_seconds": 600,
+    }
+    return QueryEmbeddingCache(**{**options, **overrides})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(embedding_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_float32_encoding_round_trips_exactly():
+    cache = _cache(dtype="float32")
+    embedding = [0.5, -1.25, 3.0, 0.0]
+
+    data = cache._encode(embedding)
+
+    assert len(data) == 4 * len(embedding)
+    assert cache._decode(data) == embedding
+
+
+def test_float16_encoding_halves_the_size_within_precision():
+    cache = _cache(dtype="float16")
+    embedding = [0.123456, -0.987654, 0.5, 1e-3]
+
+    data = cache._encode(embedding)
+
+    assert len(data) == 2 * len(embedding)
+    assert cache._decode(data) == pytest.approx(embedding, rel=1e-3)
+
+
+def test_unsupported_dtype_is_rejected():
+    with pytest.raises(ValueError):
+        _cache(dtype="int8")
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = _cache(max_size=2)
+    cache.set("first", [1.0])
+    cache.set("second", [2.0])
+    cache.get("first")  # now more recently used than "second"
+
+    cache.set("third", [3.0])
+
+    assert cache.get("first") == [1.0]
+    assert cache.get("second") is None
+    assert cache.get("third") == [3.0]
+    assert cache.stats()["local_size"] == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = _cache(ttl_seconds=60)
+    cache.set("query", [1.0])
+
+    clock[0] += 59
+    assert cache.get("query") == [1.0]
+
+    clock[0] += 2
+    assert cache.get("query") is None
+    assert cache.stats()["local_size"] == 0
+    assert (cache.local_hits, cache.misses) == (1, 1)
+
+
+def test_normalized_queries_share_an_entry():
+    cache = _cache()
+    cache.set("  What is   the Total? ", [1.0])
+
+    assert cache.get("what is the total?") == [1.0]
@@ -0,0 +1,79 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core import embedding_providers
+from app.core.embedding_providers import EmbeddingProvider, get_embedding_provider
+
+settings = embedding_providers.settings
+
+
+class _CountingProvider(EmbeddingProvider):
+    name = "google"
+    created = 0
+    output_dimension = 0
+
+    def __init__(self, model: str):
+        super().__init__(model)
+        time.sleep(0.05)  # widen the window for concurrent first calls
+        type(self).created += 1
+
+    @property
+    def dimension(self) -> int:
+        return settings.embedding_dimension
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [[0.0] * self.output_dimension for _ in texts]
+
+
+@pytest.fixture
+def counting_provider(monkeypatch):
+    _CountingProvider.created = 0
+    _CountingProvider.output_dimension = settings.embedding_dimension
+    monkeypatch.setattr(embedding_providers, "_provider", None)
+    monkeypatch.setitem(embedding_providers._PROVIDERS, "google", _CountingProvider)
+    monkeypatch.setattr(settings, "embedding_model", "models/test-embedding")
+    return _CountingProvider
+
+
+def test_provider_is_created_once_across_threads(counting_provider):
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        providers = list(executor.map(lambda _: get_embedding_provider(), range(8)))
+
+    assert counting_provider.created == 1
+    assert all(provider is providers[0] for provider in providers)
+
+
+def test_first_response_of_the_wrong_size_is_rejected(counting_provider):
+    counting_provider.output_dimension = settings.embedding_dimension + 1
+    provider = get_embedding_provider()
+
+    with pytest.raises(ValueError, match="embedding_dimension"):
+        provider.check_dimension(provider.embed_query("text"))
+
+
+def test_known_google_dimension_mismatch_fails_at_startup(monkeypatch):
+    monkeypatch.setattr(embedding_providers, "_provider", None)
+    monkeypatch.setattr(settings, "embedding_model", "models/text-embedding-004")
+    monkeypatch.setattr(settings, "embedding_dimension", 3072)
+    monkeypatch.setattr(
+        embedding_providers.GoogleEmbeddingProvider,
+        "__init__",
+        EmbeddingProvider.__init__,
+    )
+
+    with pytest.raises(ValueError, match="768-dimensional"):
+        get_embedding_provider()
+
+
+def test_google_dimension_does_not_call_the_api(monkeypatch):
+    monkeypatch.setattr(
+        embedding_providers.GoogleEmbeddingProvider,
+        "__init__",
+        EmbeddingProvider.__init__,
+    )
+    provider = embedding_providers.GoogleEmbeddingProvider("models/unknown")
+
+    assert provider.dimension == settings.embedding_dimension
+    assert not hasattr(provider, "_client")
@@ -0,0 +1,100 @@
+import pytest
+import redis
+
+from app.core import embeddings
+from app.core.embeddings import RedisTokenBucket, TokenBucket
+
+
+class _FakeClock:
+    """Stands in for the time module; sleeping advances the clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _FakeClock()
+    monkeypatch.setattr(embeddings, "time", clock)
+    return clock
+
+
+def test_token_bucket_allows_a_burst_of_its_capacity(clock):
+    bucket = TokenBucket(rate_per_minute=600)  # capacity 10
+
+    for _ in range(10):
+        bucket.acquire()
+
+    assert clock.sleeps == []
+
+
+def test_token_bucket_waits_for_the_next_token(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=2)
+
+    for _ in range(4):
+        bucket.acquire()
+
+    assert clock.sleeps == pytest.approx([1.0, 1.0])
+    assert clock.now == pytest.approx(1002.0)
+
+
+def test_token_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate_per_minute=120, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+
+    clock.now += 60  # refills far more than the capacity
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    assert clock.sleeps == pytest.approx([0.5])
+
+
+def test_token_bucket_capacity_defaults_to_one_second_of_requests(clock):
+    assert TokenBucket(rate_per_minute=300).capacity == 5
+    assert TokenBucket(rate_per_minute=30).capacity == 1
+
+
+class _FakeScript:
+    """Stands in for the Redis token bucket script, replaying its replies."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    def __call__(self, keys, args):
+        self.calls += 1
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def test_redis_token_bucket_sleeps_until_redis_grants_a_token(clock):
+    bucket = RedisTokenBucket("ratelimit:test", rate_per_minute=60)
+    bucket._script = _FakeScript(b"0.25", b"0.5", b"0")
+
+    bucket.acquire()
+
+    assert clock.sleeps == pytest.approx([0.25, 0.5])
+    assert bucket._script.calls == 3
+
+
+def test_redis_token_bucket_falls_back_to_local_bucket(clock):
+    bucket = RedisTokenBucket("ratelimit:test", rate_per_minute=60, capacity=1)
+    bucket._script = _FakeScript(*[redis.ConnectionError("down")] * 2)
+
+    bucket.acquire()
+    bucket.acquire()
+
+    assert clock.sleeps == pytest.approx([1.0])
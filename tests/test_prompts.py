@@ -0,0 +1,108 @@
+import uuid
+
+from app.core.prompts import _merge_overlap, build_context, estimate_tokens
+from app.core.retrieval import mmr_rerank
+from app.models.database import DocumentChunk
+
+TEXT = (
+    "The lease starts in March. Rent is due on the first of each month. "
+    "Late payments incur a fee of five percent. The tenant pays utilities."
+)
+
+
+def _chunk(document_id, index, start, end, embedding=None, text=TEXT):
+    return DocumentChunk(
+        id=uuid.uuid4(),
+        document_id=document_id,
+        chunk_index=index,
+        content=text[start:end],
+        chunk_metadata={"char_start": start, "char_end": end},
+        embedding=embedding,
+    )
+
+
+def test_merge_overlap_drops_shared_characters():
+    document_id = uuid.uuid4()
+    first = _chunk(document_id, 0, 0, 67)
+    second = _chunk(document_id, 1, 27, 110)
+
+    assert _merge_overlap(first.content, first, second) == TEXT[:110]
+
+
+def test_merge_overlap_joins_on_new_line_without_overlap():
+    document_id = uuid.uuid4()
+    first = _chunk(document_id, 0, 0, 26)
+    second = _chunk(document_id, 1, 27, 67)
+
+    merged = _merge_overlap(first.content, first, second)
+    assert merged == f"{TEXT[:26]}\n{TEXT[27:67]}"
+
+
+def test_merge_overlap_ignores_chance_matches_without_offsets():
+    # "s." ends one chunk and starts the next by chance only
+    first = DocumentChunk(content="It rains.", chunk_metadata={})
+    second = DocumentChunk(content="s. Then it snows", chunk_metadata=None)
+
+    assert _merge_overlap(first.content, first, second) == (
+        "It rains.\ns. Then it snows"
+    )
+
+
+def test_build_context_merges_neighbours_in_rank_order():
+    document_id = uuid.uuid4()
+    other_id = uuid.uuid4()
+    first = _chunk(document_id, 0, 0, 67)
+    second = _chunk(document_id, 1, 27, 110)
+    unrelated = _chunk(other_id, 4, 111, len(TEXT))
+
+    texts, used, tokens = build_context([second, unrelated, first], token_budget=10_000)
+
+    assert texts == [TEXT[:110], TEXT[111:]]
+    assert used == [second, unrelated, first]
+    assert tokens == sum(estimate_tokens(text) for text in texts)
+
+
+def test_build_context_respects_token_budget_but_keeps_first():
+    document_id = uuid.uuid4()
+    chunks = [_chunk(document_id, i * 2, 0, len(TEXT)) for i in range(3)]
+    budget = estimate_tokens(TEXT)
+
+    texts, used, _ = build_context(chunks, token_budget=budget)
+    assert used == chunks[:1]
+    assert texts == [TEXT]
+
+    texts, used, _ = build_context(chunks, token_budget=1)
+    assert used == chunks[:1]
+
+
+def test_build_context_labels_passages():
+    document_id = uuid.uuid4()
+    chunk = _chunk(document_id, 0, 0, 26)
+
+    texts, _, _ = build_context([chunk], label=lambda c: "[lease.pdf]")
+    assert texts == [f"[lease.pdf]\n{TEXT[:26]}"]
+
+
+def test_mmr_rerank_demotes_near_duplicates():
+    document_id = uuid.uuid4()
+    best = _chunk(document_id, 0, 0, 10, embedding=[1.0, 0.0, 0.0])
+    duplicate = _chunk(document_id, 1, 0, 10, embedding=[0.99, 0.1, 0.0])
+    different = _chunk(document_id, 2, 0, 10, embedding=[0.6, 0.0, 0.8])
+
+    ranked = mmr_rerank([duplicate, different, best], [1.0, 0.0, 0.0], 0.3)
+    assert ranked == [best, different, duplicate]
+
+
+def test_mmr_rerank_is_relevance_order_with_lambda_one():
+    document_id = uuid.uuid4()
+    chunks = [
+        _chunk(document_id, i, 0, 10, embedding=embedding)
+        for i, embedding in enumerate([[0.2, 1.0], [1.0, 0.0], [1.0, 0.5]])
+    ]
+
+    ranked = mmr_rerank(chunks, [1.0, 0.0], 1.0)
+    assert ranked == [chunks[1], chunks[2], chunks[0]]
+
+
+def test_mmr_rerank_keeps_short_lists():
+    assert mmr_rerank([], [1.0]) == []
@@ -0,0 +1,106 @@
+"""
+Check that hot lookups use their indexes with the planner's default
+settings.
+
+Needs a migrated PostgreSQL database at DATABASE_URL_SYNC and is skipped
+when none can be reached. Representative rows are inserted and analyzed in
+a transaction that is rolled back afterwards, so the planner sees tables
+large enough for the indexes to matter.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.workers.tasks import SyncSession
+
+DOCUMENTS = 5000
+CHUNKS_PER_DOCUMENT = 40
+
+CHECKS = [
+    (
+        "chunks by document",
+        "SELECT id FROM document_chunks WHERE document_id = :document_id "
+        "ORDER BY chunk_index",
+        "ix_document_chunks_document_id_chunk_index",
+    ),
+    (
+        "embedded chunks by document",
+        "SELECT id FROM document_chunks WHERE document_id = :document_id "
+        "AND embedding IS NOT NULL",
+        "ix_document_chunks_document_id_embedded",
+    ),
+    (
+        "documents by created_at",
+        "SELECT id FROM documents ORDER BY created_at DESC LIMIT 20",
+        "ix_documents_created_at_id",
+    ),
+    (
+        "documents by status, keyset",
+        "SELECT id FROM documents WHERE status = 'COMPLETED' "
+        "AND (created_at, id) < (now(), :document_id) "
+        "ORDER BY created_at DESC, id DESC LIMIT 20",
+        "ix_documents_status_created_at_id",
+    ),
+]
+
+
+@pytest.fixture(scope="module")
+def db():
+    session = SyncSession()
+    try:
+        session.execute(text("SELECT 1"))
+    except OperationalError:
+        session.close()
+        pytest.skip("No database reachable at DATABASE_URL_SYNC")
+
+    session.execute(
+        text(
+            "INSERT INTO documents "
+            "(id, filename, content_type, status, created_at, updated_at) "
+            "SELECT gen_random_uuid(), 'plan-check-' || i || '.txt', "
+            "'text/plain', (ARRAY['PENDING', 'PROCESSING', 'COMPLETED', "
+            "'FAILED'])[1 + i % 4]::documentstatus, "
+            "now() - i * interval '1 minute', now() "
+            "FROM generate_series(1, :documents) AS i"
+        ),
+        {"documents": DOCUMENTS},
+    )
+    session.execute(
+        text(
+            "INSERT INTO document_chunks "
+            "(id, document_id, content, chunk_index, chunk_metadata) "
+            "SELECT gen_random_uuid(), d.id, 'chunk ' || c, c, '{}'::jsonb "
+            "FROM documents d CROSS JOIN generate_series(0, :chunks - 1) AS c "
+            "WHERE d.filename LIKE 'plan-check-%'"
+        ),
+        {"chunks": CHUNKS_PER_DOCUMENT},
+    )
+    session.execute(text("ANALYZE documents"))
+    session.execute(text("ANALYZE document_chunks"))
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+def _index_names(plan: dict) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [check[1:] for check in CHECKS],
+    ids=[check[0] for check in CHECKS],
+)
+def test_query_uses_index(db, query, expected):
+    plan = db.execute(
+        text(f"EXPLAIN (FORMAT JSON) {query}"), {"document_id": uuid.uuid4()}
+    ).scalar()
+    assert expected in _index_names(plan[0]["Plan"])
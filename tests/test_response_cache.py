@@ -0,0 +1,153 @@
+import json
+import uuid
+
+import pytest
+
+from app.core import response_cache
+
+EMBEDDING = [1.0, 0.0, 0.0, 0.0]
+CHUNK_IDS = ["chunk-1", "chunk-2"]
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args) for name, args in self.commands]
+
+
+class _FakeRedis:
+    """The subset of the async Redis client the response cache uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.reads = []
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    async def lpush(self, key, value):
+        self.data.setdefault(key, []).insert(0, value.encode("utf-8"))
+
+    async def ltrim(self, key, start, end):
+        self.data[key] = self.data[key][start : end + 1]
+
+    async def lrange(self, key, start, end):
+        self.reads.append(key)
+        return list(self.data.get(key, []))
+
+    async def expire(self, key, seconds):
+        pass
+
+    async def sadd(self, key, member):
+        self.data.setdefault(key, set()).add(member)
+
+    async def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def hincrby(self, key, field, amount):
+        counters = self.data.setdefault(key, {})
+        counters[field] = counters.get(field, 0) + amount
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = _FakeRedis()
+    monkeypatch.setattr(response_cache, "get_async_redis", lambda: client)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_lookup_returns_answer_for_similar_query(fake_redis):
+    document_id = uuid.uuid4()
+    await response_cache.store_response(document_id, EMBEDDING, CHUNK_IDS, "42")
+
+    answer = await response_cache.lookup_response(
+        document_id, [1.0, 0.01, 0.0, 0.0], CHUNK_IDS
+    )
+
+    assert answer == "42"
+
+
+@pytest.mark.asyncio
+async def test_lookup_misses_query_beyond_max_distance(fake_redis):
+    document_id = uuid.uuid4()
+    await response_cache.store_response(document_id, EMBEDDING, CHUNK_IDS, "42")
+
+    answer = await response_cache.lookup_response(
+        document_id, [1.0, 1.0, 0.0, 0.0], CHUNK_IDS
+    )
+
+    assert answer is None
+
+
+@pytest.mark.asyncio
+async def test_lookup_only_reads_entries_for_the_same_chunks(fake_redis):
+    document_id = uuid.uuid4()
+    await response_cache.store_response(document_id, EMBEDDING, ["chunk-3"], "other")
+
+    answer = await response_cache.lookup_response(document_id, EMBEDDING, CHUNK_IDS)
+
+    assert answer is None
+    assert fake_redis.reads == [response_cache._entries_key(document_id, CHUNK_IDS)]
+
+
+@pytest.mark.asyncio
+async def test_lookup_skips_expired_entries(fake_redis, monkeypatch):
+    document_id = uuid.uuid4()
+    now = 1_000_000.0
+    monkeypatch.setattr(response_cache.time, "time", lambda: now)
+    await response_cache.store_response(document_id, EMBEDDING, CHUNK_IDS, "42")
+
+    now += response_cache.settings.response_cache_ttl_seconds + 1
+
+    assert (
+        await response_cache.lookup_response(document_id, EMBEDDING, CHUNK_IDS) is None
+    )
+
+
+@pytest.mark.asyncio
+async def test_lookup_skips_malformed_entries(fake_redis):
+    document_id = uuid.uuid4()
+    await response_cache.store_response(document_id, EMBEDDING, CHUNK_IDS, "42")
+    key = response_cache._entries_key(document_id, CHUNK_IDS)
+    for raw in ["not json", json.dumps({"answer": "stale"}), json.dumps([1, 2])]:
+        await fake_redis.lpush(key, raw)
+
+    answer = await response_cache.lookup_response(document_id, EMBEDDING, CHUNK_IDS)
+
+    assert answer == "42"
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_every_chunk_set_of_the_document(fake_redis):
+    document_id, other_id = uuid.uuid4(), uuid.uuid4()
+    await response_cache.store_response(document_id, EMBEDDING, CHUNK_IDS, "a")
+    await response_cache.store_response(document_id, EMBEDDING, ["chunk-3"], "b")
+    await response_cache.store_response(other_id, EMBEDDING, CHUNK_IDS, "c")
+
+    await response_cache.invalidate_document(document_id)
+
+    assert (
+        await response_cache.lookup_response(document_id, EMBEDDING, CHUNK_IDS) is None
+    )
+    assert (
+        await response_cache.lookup_response(document_id, EMBEDDING, ["chunk-3"])
+        is None
+    )
+    assert await response_cache.lookup_response(other_id, EMBEDDING, CHUNK_IDS) == "c"
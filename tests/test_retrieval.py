@@ -0,0 +1,63 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import retrieval
+from app.models.database import DocumentChunk
+
+DIMENSIONS = DocumentChunk.embedding.type.dim
+
+
+class _FakeSession:
+    """Answers index scans with `ann_rows` and full scans with `exact_rows`."""
+
+    def __init__(self, ann_rows: int, exact_rows: int):
+        self.ann_rows = ann_rows
+        self.exact_rows = exact_rows
+        self.searches = []
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        if "set_config" in sql:
+            return None
+        exact = "embedding_half IS NOT NULL" not in sql
+        self.searches.append("exact" if exact else "ann")
+        rows = [
+            uuid.uuid4() for _ in range(self.exact_rows if exact else self.ann_rows)
+        ]
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: rows))
+
+
+async def _search(db, top_k=5):
+    return await retrieval.search_similar_chunks_multi_doc(
+        db,
+        [uuid.uuid4(), uuid.uuid4()],
+        "query",
+        top_k=top_k,
+        query_embedding=[0.1] * DIMENSIONS,
+    )
+
+
+@pytest.mark.asyncio
+async def test_multi_doc_search_uses_index_when_it_fills_top_k():
+    db = _FakeSession(ann_rows=5, exact_rows=5)
+
+    assert len(await _search(db)) == 5
+    assert db.searches == ["ann"]
+
+
+@pytest.mark.asyncio
+async def test_multi_doc_search_falls_back_to_exact_when_index_comes_back_short():
+    db = _FakeSession(ann_rows=2, exact_rows=5)
+
+    assert len(await _search(db)) == 5
+    assert db.searches == ["ann", "exact"]
+
+
+@pytest.mark.asyncio
+async def test_multi_doc_search_returns_short_exact_results():
+    db = _FakeSession(ann_rows=1, exact_rows=3)
+
+    assert len(await _search(db)) == 3
+    assert db.searches == ["ann", "exact"]
@@ -0,0 +1,50 @@
+import uuid
+
+from app.workers.tasks import _pack_chunk_ranges
+
+
+def _pending(*documents: tuple[uuid.UUID, list[int]]) -> list[tuple[uuid.UUID, int]]:
+    return [(document_id, i) for document_id, indexes in documents for i in indexes]
+
+
+def test_small_documents_share_a_task():
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    pending = _pending((first, [0, 1, 2]), (second, [0, 1]), (third, [0]))
+
+    assert _pack_chunk_ranges(pending, per_task=10) == [
+        [[str(first), 0, 2], [str(second), 0, 1], [str(third), 0, 0]]
+    ]
+
+
+def test_large_documents_are_split_across_tasks():
+    first, second = uuid.uuid4(), uuid.uuid4()
+    pending = _pending((first, list(range(5))), (second, list(range(3))))
+
+    assert _pack_chunk_ranges(pending, per_task=3) == [
+        [[str(first), 0, 2]],
+        [[str(first), 3, 4], [str(second), 0, 0]],
+        [[str(second), 1, 2]],
+    ]
+
+
+def test_tasks_hold_at_most_per_task_chunks():
+    pending = _pending(
+        *((uuid.uuid4(), list(range(size))) for size in [1, 7, 2, 9, 4, 1, 1, 12])
+    )
+
+    tasks = _pack_chunk_ranges(pending, per_task=5)
+
+    sizes = [sum(last - first + 1 for _, first, last in task) for task in tasks]
+    assert all(size == 5 for size in sizes[:-1])
+    assert sum(sizes) == len(pending)
+    unpacked = [
+        (document_id, i)
+        for task in tasks
+        for document_id, first, last in task
+        for i in range(first, last + 1)
+    ]
+    assert unpacked == [(str(document_id), i) for document_id, i in pending]
+
+
+def test_nothing_pending_packs_no_tasks():
+    assert _pack_chunk_ranges([], per_task=5) == []
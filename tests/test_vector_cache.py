@@ -0,0 +1,155 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.core import retrieval
+from app.core.vector_cache import SEARCH_BLOCK_ROWS, DocumentVectorCache
+from app.models.database import DocumentChunk
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _embeddings(rows: int, dimensions: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((rows, dimensions))
+
+
+def _put(cache, document_id, embeddings, updated_at=NOW):
+    rows = len(embeddings)
+    return cache.put(
+        document_id,
+        updated_at,
+        [uuid.uuid4() for _ in range(rows)],
+        list(range(rows)),
+        [f"chunk {i}" for i in range(rows)],
+        [{} for _ in range(rows)],
+        embeddings.tolist(),
+    )
+
+
+def _expected_top(embeddings: np.ndarray, query: np.ndarray, k: int) -> list[int]:
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return list(np.argsort(-scores)[:k])
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+@pytest.mark.parametrize("rows", [1, 7, SEARCH_BLOCK_ROWS + 3])
+def test_search_returns_top_k_by_cosine_similarity(dtype, rows):
+    embeddings = _embeddings(rows)
+    query = _embeddings(1, seed=1)[0]
+    cache = DocumentVectorCache(max_bytes=10_000_000, dtype=dtype)
+    entry = _put(cache, uuid.uuid4(), embeddings)
+
+    results = entry.search(query.tolist(), 5)
+
+    assert [row for row, _ in results] == _expected_top(embeddings, query, 5)
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+    assert all(-1.001 <= score <= 1.001 for score in scores)
+
+
+def test_search_of_exact_match_scores_one():
+    embeddings = _embeddings(20)
+    entry = _put(DocumentVectorCache(max_bytes=10_000_000), uuid.uuid4(), embeddings)
+
+    (row, score), *_ = entry.search((embeddings[12] * 3).tolist(), 3)
+    assert row == 12
+    assert score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_get_hits_only_the_loaded_version():
+    cache = DocumentVectorCache(max_bytes=10_000_000)
+    document_id = uuid.uuid4()
+    entry = _put(cache, document_id, _embeddings(4))
+
+    assert cache.get(document_id, NOW) is entry
+    assert cache.get(document_id, NOW + timedelta(seconds=1)) is None
+    assert cache.get(document_id, NOW) is None
+    assert cache.get(document_id, NOW, record=False) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_put_evicts_least_recently_used():
+    entry_bytes = _put(DocumentVectorCache(10**6), uuid.uuid4(), _embeddings(8)).nbytes
+    cache = DocumentVectorCache(max_bytes=entry_bytes * 2)
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    _put(cache, first, _embeddings(8))
+    _put(cache, second, _embeddings(8))
+    cache.get(first, NOW)
+    _put(cache, third, _embeddings(8))
+
+    assert cache.get(second, NOW) is None
+    assert cache.get(first, NOW) is not None
+    assert cache.get(third, NOW) is not None
+    assert cache.total_bytes <= cache.max_bytes
+
+
+def test_put_remembers_oversized_documents():
+    cache = DocumentVectorCache(max_bytes=100)
+    document_id = uuid.uuid4()
+
+    assert _put(cache, document_id, _embeddings(8)) is None
+    assert cache.is_oversized(document_id, NOW)
+    assert not cache.is_oversized(document_id, NOW + timedelta(seconds=1))
+    cache.invalidate(document_id)
+    assert not cache.is_oversized(document_id, NOW)
+
+
+class _FakeSession:
+    """Returns chunk rows for any statement, counting the queries."""
+
+    def __init__(self, rows: int, dimensions: int):
+        self.rows = [
+            SimpleNamespace(
+                id=uuid.uuid4(),
+                chunk_index=i,
+                content=f"chunk {i}",
+                chunk_metadata={},
+                embedding=vector,
+            )
+            for i, vector in enumerate(_embeddings(rows, dimensions).tolist())
+        ]
+        self.queries = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        await asyncio.sleep(0.01)
+        limit = stmt._limit_clause.value
+        return SimpleNamespace(all=lambda: self.rows[:limit])
+
+
+@pytest.fixture
+def vector_cache(monkeypatch):
+    cache = DocumentVectorCache(max_bytes=10_000_000)
+    monkeypatch.setattr(retrieval, "get_document_vector_cache", lambda: cache)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_load_once(vector_cache):
+    db = _FakeSession(rows=5, dimensions=DocumentChunk.embedding.type.dim)
+    document_id = uuid.uuid4()
+
+    entries = await asyncio.gather(
+        *(retrieval._get_cached_document(db, document_id, NOW) for _ in range(5))
+    )
+
+    assert db.queries == 1
+    assert all(entry is entries[0] and entry is not None for entry in entries)
+    assert (vector_cache.hits, vector_cache.misses) == (0, 5)
+
+
+@pytest.mark.asyncio
+async def test_oversized_document_is_loaded_once(vector_cache):
+    vector_cache.max_chunks = lambda dimensions: 3
+    db = _FakeSession(rows=4, dimensions=DocumentChunk.embedding.type.dim)
+    document_id = uuid.uuid4()
+
+    assert await retrieval._get_cached_document(db, document_id, NOW) is None
+    assert await retrieval._get_cached_document(db, document_id, NOW) is None
+    assert db.queries == 1